@@ -0,0 +1,113 @@
+"""
+API request benchmark for WhisperWriter.
+
+Starts a local stub of the OpenAI transcription endpoint, which answers after a configurable latency
+and occasionally much later, and reports:
+
+- p50/p95/p99 request latency of the pooled ApiClient with and without hedged requests
+- the time to upload a long dictation in chunks cut at pauses, with increasing numbers of concurrent uploads
+
+    python src/api_benchmark.py --requests 200 --slow-ratio 0.05
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+from api_client import ApiClient
+from transcription import transcribe_api_chunked
+from utils import ConfigManager
+
+
+def start_stub_server(args):
+    """
+    Start the stub transcription endpoint on a free local port.
+
+    :return: The running ThreadingHTTPServer
+    """
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            content_length = int(self.headers.get('Content-Length', 0))
+            self.rfile.read(content_length)
+            slow = random.random() < args.slow_ratio
+            audio_seconds = content_length / 32000
+            time.sleep((args.slow_latency if slow else args.latency) + audio_seconds / args.decode_speed)
+            body = json.dumps({'text': 'stub transcription'}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure_hedging(base_url, args):
+    """Print request latency percentiles with hedged requests off and on."""
+    audio_file = ('audio.wav', b'\0' * 32000, 'audio/wav')
+    for hedge_requests in (False, True):
+        client = ApiClient('stub', base_url, hedge_requests=hedge_requests, hedge_delay=args.latency * 3)
+        latencies = []
+        for _ in range(args.requests):
+            start_time = time.perf_counter()
+            client.transcribe(audio_file, model='whisper-1')
+            latencies.append(time.perf_counter() - start_time)
+        client.close()
+        print(f'hedging {"on " if hedge_requests else "off"}: p50 {np.percentile(latencies, 50) * 1000:7.1f} ms, '
+              f'p95 {np.percentile(latencies, 95) * 1000:7.1f} ms, p99 {np.percentile(latencies, 99) * 1000:7.1f} ms')
+
+
+def measure_chunked_upload(base_url, args):
+    """Print how long a long dictation takes to upload in chunks with 1, 2, 4 and 8 concurrent uploads."""
+    os.environ['OPENAI_API_KEY'] = 'stub'
+    ConfigManager.initialize()
+    ConfigManager.set_config_value(False, 'misc', 'print_to_terminal')
+    ConfigManager.set_config_value(False, 'recording_options', 'compact_audio')
+    for key, value in (('base_url', base_url), ('upload_format', 'wav'), ('chunked_upload', True)):
+        ConfigManager.set_config_value(value, 'model_options', 'api', key)
+    frame_count = int(args.dictation_minutes * 60 * 1000 / 30)
+    speech_mask = [(i % 105) < 90 for i in range(frame_count)]  # 2.7 second phrases with 0.45 second pauses
+    dictation = np.zeros(frame_count * 480, dtype=np.int16)
+
+    print(f'{args.dictation_minutes:g} minute dictation:')
+    for concurrent_uploads in (1, 2, 4, 8):
+        ConfigManager.set_config_value(concurrent_uploads, 'model_options', 'api', 'concurrent_uploads')
+        start_time = time.perf_counter()
+        transcribe_api_chunked(dictation, speech_mask)
+        print(f'  {concurrent_uploads} concurrent uploads: {time.perf_counter() - start_time:6.2f} s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure API request latency against a local stub server.')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help='Typical stub response time in seconds')
+    parser.add_argument('--slow-ratio', type=float, default=0.05, help='Fraction of responses that are slow')
+    parser.add_argument('--slow-latency', type=float, default=1.0, help='Response time of slow responses')
+    parser.add_argument('--decode-speed', type=float, default=60.0,
+                        help='Seconds of 16 kHz WAV audio the stub decodes per second')
+    parser.add_argument('--dictation-minutes', type=float, default=10.0,
+                        help='Length of the dictation uploaded in chunks')
+    args = parser.parse_args()
+
+    server = start_stub_server(args)
+    base_url = f'http://127.0.0.1:{server.server_port}/v1'
+    try:
+        measure_hedging(base_url, args)
+        measure_chunked_upload(base_url, args)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, CancelledError, FIRST_COMPLETED
+
+import numpy as np
+
+from utils import ConfigManager
+
+
+class ApiClient:
+    """
+    Long-lived OpenAI client used for all API transcriptions.
+
+    The client keeps a pool of keep-alive connections to base_url, so only the first request pays for
+    connecting and the TLS handshake. Failed requests are retried with exponential backoff by the OpenAI
+    client itself. With hedged requests enabled, a second identical request is sent when the first one
+    takes longer than the 95th percentile of recent request latencies, and whichever answers first wins.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # Number of timed requests needed before the 95th percentile replaces hedge_delay
+    min_latency_samples = 20
+
+    # Seconds between checks for cancellation while waiting for a response
+    cancel_poll_interval = 0.05
+
+    def __init__(self, api_key, base_url, connect_timeout=5.0, request_timeout=30.0, max_retries=2,
+                 hedge_requests=False, hedge_delay=2.0, max_connections=4):
+        """
+        Initialize the ApiClient.
+
+        :param api_key: API key, or None for endpoints that do not need one
+        :param base_url: Base URL of the OpenAI-compatible API
+        :param connect_timeout: Seconds to wait for a connection to be established
+        :param request_timeout: Seconds to wait for a response
+        :param max_retries: Number of times a failed request is retried, with exponential backoff
+        :param hedge_requests: Whether to send a second request when the first one is slow
+        :param hedge_delay: Seconds to wait before hedging until enough requests have been timed
+        :param max_connections: Size of the connection pool and of the request thread pool
+        """
+        import httpx
+        from openai import OpenAI
+
+        timeout = httpx.Timeout(request_timeout, connect=connect_timeout)
+        self._http_client = httpx.Client(timeout=timeout,
+                                         limits=httpx.Limits(max_connections=max_connections,
+                                                             max_keepalive_connections=max_connections,
+                                                             keepalive_expiry=300))
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=max_retries,
+                             http_client=self._http_client)
+        self.hedge_requests = hedge_requests
+        self.hedge_delay = hedge_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='api-request')
+        self._latencies = deque(maxlen=100)
+        self._settings = None
+        self._config_version = None
+
+    @classmethod
+    def get(cls):
+        """
+        Return the shared ApiClient, creating it again if the API settings have changed.
+
+        The settings are only compared again after the configuration version has changed.
+        """
+        version = ConfigManager.get_version()
+        instance = cls._instance
+        if instance is not None and instance._config_version == version:
+            return instance
+
+        api_options = ConfigManager.get_snapshot('model_options').api
+        settings = (os.getenv('OPENAI_API_KEY') or None,
+                    api_options.base_url or 'https://api.openai.com/v1',
+                    api_options.get('connect_timeout') or 5.0,
+                    api_options.get('request_timeout') or 30.0,
+                    api_options.get('max_retries') or 0,
+                    bool(api_options.get('hedge_requests')),
+                    api_options.get('hedge_delay') or 2.0,
+                    # Room for every concurrent chunk upload and a hedged request for each
+                    max(4, 2 * (api_options.get('concurrent_uploads') or 1)))
+
+        with cls._instance_lock:
+            if cls._instance is None or cls._instance._settings != settings:
+                if cls._instance is not None:
+                    cls._instance.close()
+                cls._instance = cls(*settings)
+                cls._instance._settings = settings
+            cls._instance._config_version = version
+            return cls._instance
+
+    def close(self):
+        """Close the pooled connections once the requests in progress have finished."""
+        self._executor.shutdown(wait=False)
+        threading.Thread(target=self._http_client.close, daemon=True).start()
+
+    def hedge_threshold(self):
+        """Return how long to wait for a response before sending a hedged request."""
+        if len(self._latencies) < self.min_latency_samples:
+            return self.hedge_delay
+        return float(np.percentile(self._latencies, 95))
+
+    def transcribe(self, file, deadline=None, cancel_event=None, **params):
+        """
+        Transcribe an audio file.
+
+        :param file: Tuple of file name, file contents as bytes and content type
+        :param deadline: Seconds after which to give up waiting, or None to wait for the request timeout
+        :param cancel_event: Optional threading.Event that abandons the request when set
+        :param params: Further parameters of the transcription request, such as model and language
+        :return: The transcribed text
+        :raises TimeoutError: If no response arrived before the deadline
+        :raises CancelledError: If cancel_event was set before a response arrived
+        """
+        start_time = time.perf_counter()
+        end_time = start_time + deadline if deadline is not None else None
+        futures = [self._executor.submit(self._request, file, params)]
+        if self.hedge_requests:
+            hedge_threshold = self.hedge_threshold()
+            if end_time is not None:
+                hedge_threshold = min(hedge_threshold, end_time - start_time)
+            done, _ = self._wait(futures, hedge_threshold, cancel_event)
+            if not done:
+                futures.append(self._executor.submit(self._request, file, params))
+
+        # Use the first successful response; only fail if every request failed.
+        # Requests still running after the deadline are abandoned and their responses discarded.
+        pending = set(futures)
+        error = None
+        while pending:
+            timeout = max(0.0, end_time - time.perf_counter()) if end_time is not None else None
+            done, pending = self._wait(pending, timeout, cancel_event)
+            if not done:
+                raise TimeoutError(f'The API did not respond within {deadline:.2f} seconds.')
+            for future in done:
+                if future.exception() is None:
+                    hedged = f' ({len(futures)} requests sent)' if len(futures) > 1 else ''
+                    ConfigManager.console_print(f'API request took {time.perf_counter() - start_time:.2f} seconds{hedged}.')
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _wait(self, futures, timeout, cancel_event):
+        """
+        Wait for the first of futures to complete, checking cancel_event while waiting.
+
+        Requests that are abandoned because of a cancellation keep running on the pool, but their
+        responses are discarded.
+        """
+        if cancel_event is None:
+            return wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+        end_time = time.perf_counter() + timeout if timeout is not None else None
+        while True:
+            if cancel_event.is_set():
+                for future in futures:
+                    future.cancel()
+                raise CancelledError('The API request was cancelled.')
+            poll_interval = self.cancel_poll_interval
+            if end_time is not None:
+                poll_interval = min(poll_interval, max(0.0, end_time - time.perf_counter()))
+            done, pending = wait(futures, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            if done or (end_time is not None and time.perf_counter() >= end_time):
+                return done, pending
+
+    def _request(self, file, params):
+        name, content, content_type = file
+        start_time = time.perf_counter()
+        response = self.client.audio.transcriptions.create(file=(name, content, content_type), **params)
+        self._latencies.append(time.perf_counter() - start_time)
+        return response.text
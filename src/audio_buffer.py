@@ -0,0 +1,91 @@
+import queue
+import numpy as np
+
+
+class AudioBuffer:
+    """
+    A preallocated, growable numpy buffer for captured audio.
+
+    Frames are copied into one contiguous array whose capacity doubles when it fills up, so recording
+    never creates a Python object per sample and the finished recording is a single int16 array.
+    """
+
+    def __init__(self, initial_capacity=16000 * 60, dtype=np.int16):
+        """
+        Initialize the AudioBuffer.
+
+        :param initial_capacity: Number of samples to preallocate
+        :param dtype: Sample type of the buffer
+        """
+        self._data = np.empty(max(1, int(initial_capacity)), dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, samples):
+        """Copy a block of samples to the end of the buffer, growing it if needed."""
+        end = self._size + len(samples)
+        if end > len(self._data):
+            grown = np.empty(max(end, len(self._data) * 2), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:end] = samples
+        self._size = end
+
+    def get_audio(self, start=0):
+        """Return a contiguous copy of the samples recorded so far, optionally starting at sample index start."""
+        return self._data[start:self._size].copy()
+
+    def clear(self):
+        """Discard the recorded samples, keeping the allocated capacity."""
+        self._size = 0
+
+
+class FrameQueue:
+    """
+    Hands audio from the sounddevice callback to a consumer thread in fixed-size frames.
+
+    The callback puts each block on a `queue.SimpleQueue`, which does not take a Python-level lock, so
+    the audio thread never waits on the consumer. Unlike a bounded deque, no samples are dropped when
+    the consumer falls behind.
+    """
+
+    def __init__(self, frame_size, sample_rate=16000):
+        """
+        Initialize the FrameQueue.
+
+        :param frame_size: Number of samples in each frame returned by get_frame
+        :param sample_rate: Sample rate in Hz of the queued audio
+        """
+        self.frame_size = frame_size
+        self.sample_rate = sample_rate
+        # Samples queued from before the consumer started listening; set before the first block is queued
+        self.preroll_samples = 0
+        self._blocks = queue.SimpleQueue()
+        self._pending = np.empty(0, dtype=np.int16)
+
+    def put(self, samples):
+        """Queue a block of mono int16 samples."""
+        self._blocks.put_nowait(samples)
+
+    def get_frame(self, timeout=None):
+        """
+        Return the next frame of exactly frame_size samples.
+
+        :param timeout: Seconds to wait for audio, or None to wait indefinitely
+        :return: int16 numpy array, or None if no full frame arrived before the timeout
+        """
+        while len(self._pending) < self.frame_size:
+            try:
+                block = self._blocks.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            if len(self._pending):
+                self._pending = np.concatenate((self._pending, block))
+            else:
+                self._pending = block
+
+        frame = self._pending[:self.frame_size]
+        self._pending = self._pending[self.frame_size:]
+        return frame
@@ -0,0 +1,166 @@
+import queue
+import threading
+import numpy as np
+
+from audio_buffer import FrameQueue
+from utils import ConfigManager
+
+
+class AudioCaptureService:
+    """
+    Process-wide audio capture shared by the voice listener and the recorder.
+
+    A single input stream is kept open and every block it delivers is written to a pre-roll ring buffer
+    and handed to each subscribed FrameQueue. A recording that subscribes with pre-roll starts with the
+    audio captured just before it, such as the speech that triggered voice activation, and does not
+    have to wait for the device to open.
+
+    The audio callback never takes a lock. Subscribing and unsubscribing only queue a request, which the
+    callback applies before handling its next block, so the callback is the only thread that touches the
+    pre-roll buffer and replaces the subscriber tuple.
+    """
+
+    _instance = None
+    _service_lock = threading.Lock()
+
+    frame_duration_ms = 30  # 30ms frame duration for WebRTC VAD
+
+    def __init__(self, sample_rate, device, preroll_duration_ms):
+        """
+        Initialize the AudioCaptureService and open its input stream.
+
+        :param sample_rate: Sample rate in Hz to record at
+        :param device: Sound device to record from, or None for the default device
+        :param preroll_duration_ms: Length of the pre-roll ring buffer in milliseconds
+        """
+        self.sample_rate = sample_rate
+        self.device = device
+        self.preroll_duration_ms = preroll_duration_ms
+        self.frame_size = int(sample_rate * (self.frame_duration_ms / 1000.0))
+        self._frame_queues = set()  # Subscribed queues, changed under _service_lock
+        self._subscribers = ()  # Queues the callback hands blocks to, only replaced by the callback
+        self._subscriber_changes = queue.SimpleQueue()
+        self._preroll = np.zeros(int(sample_rate * preroll_duration_ms / 1000), dtype=np.int16)
+        self._preroll_end = 0
+        self._preroll_filled = 0
+
+        import sounddevice as sd
+
+        ConfigManager.console_print('Opening audio input stream...')
+        self._stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='int16',
+                                      blocksize=self.frame_size, device=device, callback=self._callback)
+        self._stream.start()
+
+    @classmethod
+    def subscribe(cls, include_preroll=False):
+        """
+        Start receiving captured audio, opening the input stream if it is not open yet.
+
+        :param include_preroll: Whether the returned queue should start with the buffered pre-roll audio
+        :return: FrameQueue that receives every block captured from now on
+        """
+        recording_options = ConfigManager.get_config_section('recording_options')
+        settings = (recording_options.get('sample_rate') or 16000,
+                    recording_options.get('sound_device'),
+                    recording_options.get('preroll_duration') or 0)
+
+        with cls._service_lock:
+            instance = cls._instance
+            if instance and not instance._frame_queues and settings != instance._settings():
+                # Reopen the stream so that changed recording options take effect
+                instance._close()
+                instance = None
+            if instance is None:
+                instance = cls._instance = cls(*settings)
+            return instance._add_subscriber(include_preroll)
+
+    @classmethod
+    def unsubscribe(cls, frame_queue):
+        """
+        Stop sending captured audio to a queue returned by subscribe.
+
+        The input stream stays open for the next subscriber unless keep_audio_stream_open is disabled.
+        """
+        with cls._service_lock:
+            instance = cls._instance
+            if instance is None:
+                return
+            instance._remove_subscriber(frame_queue)
+            if not instance._frame_queues and not ConfigManager.get_config_value('recording_options',
+                                                                                 'keep_audio_stream_open'):
+                instance._close()
+                cls._instance = None
+
+    @classmethod
+    def shutdown(cls):
+        """Close the input stream."""
+        with cls._service_lock:
+            if cls._instance:
+                cls._instance._close()
+                cls._instance = None
+
+    def _settings(self):
+        return self.sample_rate, self.device, self.preroll_duration_ms
+
+    def _add_subscriber(self, include_preroll):
+        frame_queue = FrameQueue(self.frame_size, self.sample_rate)
+        self._frame_queues.add(frame_queue)
+        self._subscriber_changes.put(('add', frame_queue, include_preroll))
+        return frame_queue
+
+    def _remove_subscriber(self, frame_queue):
+        if frame_queue in self._frame_queues:
+            self._frame_queues.remove(frame_queue)
+            self._subscriber_changes.put(('remove', frame_queue, False))
+
+    def _apply_subscriber_changes(self):
+        """Apply queued subscribe and unsubscribe requests on the audio thread."""
+        while True:
+            try:
+                action, frame_queue, include_preroll = self._subscriber_changes.get_nowait()
+            except queue.Empty:
+                return
+            if action == 'add':
+                # The pre-roll is taken before the next block is written to it, so no block is lost or repeated
+                if include_preroll and self._preroll_filled:
+                    preroll = self._read_preroll()
+                    frame_queue.preroll_samples = len(preroll)
+                    frame_queue.put(preroll)
+                self._subscribers += (frame_queue,)
+            else:
+                self._subscribers = tuple(subscriber for subscriber in self._subscribers
+                                          if subscriber is not frame_queue)
+
+    def _close(self):
+        ConfigManager.console_print('Closing audio input stream.')
+        self._stream.stop()
+        self._stream.close()
+
+    def _callback(self, indata, frames, time, status):
+        """sounddevice.InputStream callback that fans each block out to the pre-roll and the subscribers."""
+        if status:
+            ConfigManager.console_print(f"Audio callback status: {status}")
+        block = indata[:, 0].copy()
+        self._apply_subscriber_changes()
+        self._write_preroll(block)
+        for frame_queue in self._subscribers:
+            frame_queue.put(block)
+
+    def _write_preroll(self, block):
+        """Write a block to the pre-roll ring buffer, overwriting the oldest samples."""
+        size = len(self._preroll)
+        if not size:
+            return
+        block = block[-size:]
+        end = self._preroll_end
+        first = min(len(block), size - end)
+        self._preroll[end:end + first] = block[:first]
+        self._preroll[:len(block) - first] = block[first:]
+        self._preroll_end = (end + len(block)) % size
+        self._preroll_filled = min(size, self._preroll_filled + len(block))
+
+    def _read_preroll(self):
+        """Return the buffered pre-roll samples, oldest first."""
+        if self._preroll_filled < len(self._preroll):
+            return self._preroll[:self._preroll_filled].copy()
+        return np.concatenate((self._preroll[self._preroll_end:], self._preroll[:self._preroll_end]))
@@ -0,0 +1,110 @@
+import io
+import queue
+import threading
+import time
+
+from utils import ConfigManager
+
+# Upload format -> (file name, content type, soundfile format, soundfile subtype)
+UPLOAD_FORMATS = {
+    'wav': ('audio.wav', 'audio/wav', 'WAV', 'PCM_16'),
+    'flac': ('audio.flac', 'audio/flac', 'FLAC', 'PCM_16'),
+    'ogg_opus': ('audio.ogg', 'audio/ogg', 'OGG', 'OPUS'),
+}
+
+# Sample rates the Opus codec supports
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def get_upload_format(upload_format, sample_rate):
+    """
+    Return the upload format to use, falling back to FLAC if the requested one cannot encode the sample rate.
+    """
+    if upload_format not in UPLOAD_FORMATS:
+        ConfigManager.console_print(f'Unknown upload format {upload_format!r}. Using FLAC instead.')
+        return 'flac'
+    if upload_format == 'ogg_opus' and sample_rate not in OPUS_SAMPLE_RATES:
+        ConfigManager.console_print(f'Opus cannot encode {sample_rate} Hz audio. Using FLAC instead.')
+        return 'flac'
+    return upload_format
+
+
+class UploadEncoder:
+    """
+    Encodes audio for uploading to the API on a background thread while it is being recorded.
+
+    Frames are handed over with write as they are captured, so when recording stops only the last few
+    frames are left to encode and the upload is ready almost immediately.
+    """
+
+    def __init__(self, sample_rate, upload_format='flac'):
+        """
+        Initialize the UploadEncoder and start its encoding thread.
+
+        :param sample_rate: Sample rate in Hz of the audio
+        :param upload_format: One of the keys of UPLOAD_FORMATS
+        """
+        import soundfile as sf
+
+        self.upload_format = get_upload_format(upload_format, sample_rate)
+        self.name, self.content_type, file_format, subtype = UPLOAD_FORMATS[self.upload_format]
+        self.encode_time = 0.0
+        self._buffer = io.BytesIO()
+        self._sound_file = sf.SoundFile(self._buffer, mode='w', samplerate=sample_rate, channels=1,
+                                        format=file_format, subtype=subtype)
+        self._blocks = queue.SimpleQueue()
+        self._cancelled = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, samples):
+        """Queue a block of int16 samples for encoding."""
+        self._blocks.put(samples)
+
+    def finish(self):
+        """
+        Wait for all queued audio to be encoded.
+
+        :return: Tuple of file name, encoded bytes and content type, as expected by ApiClient.transcribe
+        """
+        wait_start = time.perf_counter()
+        self._blocks.put(None)
+        self._thread.join()
+        ConfigManager.console_print(f'Upload encoding finished {time.perf_counter() - wait_start:.3f} seconds '
+                                    f'after recording stopped.')
+        return self.name, self._buffer.getvalue(), self.content_type
+
+    def cancel(self):
+        """Stop encoding and discard the audio."""
+        self._cancelled = True
+        self._blocks.put(None)
+
+    def _run(self):
+        while True:
+            block = self._blocks.get()
+            start_time = time.perf_counter()
+            if block is None or self._cancelled:
+                self._sound_file.close()
+                self.encode_time += time.perf_counter() - start_time
+                return
+            self._sound_file.write(block)
+            self.encode_time += time.perf_counter() - start_time
+
+
+def encode_audio(audio_data, sample_rate, upload_format='flac'):
+    """
+    Encode recorded audio for uploading to the API in one go.
+
+    :param audio_data: numpy array of int16 audio
+    :param sample_rate: Sample rate in Hz of the audio
+    :param upload_format: One of the keys of UPLOAD_FORMATS
+    :return: Tuple of file name, encoded bytes and content type, and the time encoding took in seconds
+    """
+    import soundfile as sf
+
+    start_time = time.perf_counter()
+    upload_format = get_upload_format(upload_format, sample_rate)
+    name, content_type, file_format, subtype = UPLOAD_FORMATS[upload_format]
+    buffer = io.BytesIO()
+    sf.write(buffer, audio_data, sample_rate, format=file_format, subtype=subtype)
+    return (name, buffer.getvalue(), content_type), time.perf_counter() - start_time
@@ -0,0 +1,95 @@
+import numpy as np
+
+from utils import ConfigManager
+
+
+def compact_audio(audio_data, speech_mask, sample_rate, frame_duration_ms=30):
+    """
+    Remove audio that does not need to be transcribed, using the per-frame VAD decisions from recording.
+
+    Leading and trailing non-speech is trimmed, long pauses inside the recording are shortened and
+    clips with too little speech are skipped altogether.
+
+    :param audio_data: numpy array of int16 audio
+    :param speech_mask: Sequence with one speech/non-speech decision per frame of audio_data
+    :param sample_rate: Sample rate of audio_data in Hz
+    :param frame_duration_ms: Duration of the frames speech_mask refers to
+    :return: The compacted audio, or None if the speech ratio is below the configured threshold
+    """
+    recording_options = ConfigManager.get_config_section('recording_options')
+    frame_size = int(sample_rate * (frame_duration_ms / 1000.0))
+    frame_count = min(len(speech_mask), len(audio_data) // frame_size)
+    if frame_count == 0:
+        return audio_data
+
+    mask = np.asarray(speech_mask[:frame_count], dtype=bool)
+    speech_ratio = mask.mean()
+    min_speech_ratio = recording_options.get('min_speech_ratio') or 0.0
+    if speech_ratio < min_speech_ratio:
+        ConfigManager.console_print(f'Skipping transcription: speech ratio {speech_ratio:.1%} is below {min_speech_ratio:.1%}.')
+        return None
+    if not mask.any():
+        return audio_data
+
+    # Keep some audio around speech so that soft onsets and word endings are not clipped
+    padding_frames = int((recording_options.get('speech_padding') or 0) / frame_duration_ms)
+    keep = mask.copy()
+    if padding_frames:
+        window = np.ones(2 * padding_frames + 1, dtype=np.int32)
+        keep = np.convolve(mask.astype(np.int32), window, mode='same') > 0
+
+    # Shorten each internal run of non-speech to at most max_pause_frames; leading and trailing runs are dropped
+    max_pause_frames = int((recording_options.get('max_pause_duration') or 0) / frame_duration_ms)
+    edges = np.diff(np.concatenate(([1], keep.astype(np.int8), [1])))
+    for start, end in zip(np.flatnonzero(edges == -1), np.flatnonzero(edges == 1)):
+        if start == 0 or end == frame_count or end - start <= max_pause_frames:
+            continue
+        head = max_pause_frames // 2
+        keep[start:start + head] = True
+        keep[end - (max_pause_frames - head):end] = True
+
+    frames = audio_data[:frame_count * frame_size].reshape(frame_count, frame_size)
+    compacted = frames[keep].ravel()
+    ConfigManager.console_print(f'Compacted audio from {len(audio_data) / sample_rate:.2f} to '
+                                f'{len(compacted) / sample_rate:.2f} seconds (speech ratio {speech_ratio:.1%}).')
+    return compacted
+
+
+def split_at_silences(audio_data, speech_mask, sample_rate, max_chunk_duration, frame_duration_ms=30):
+    """
+    Split a recording into chunks no longer than max_chunk_duration, cutting in the middle of pauses.
+
+    Each cut is placed in the longest pause in the second half of the allowed chunk length, preferring
+    later pauses of equal length, so words are not split between chunks. Only if there is no pause at all is a chunk cut at its maximum length.
+
+    :param audio_data: numpy array of int16 audio
+    :param speech_mask: Sequence with one speech/non-speech decision per frame of audio_data
+    :param sample_rate: Sample rate of audio_data in Hz
+    :param max_chunk_duration: Maximum duration of a chunk in seconds
+    :param frame_duration_ms: Duration of the frames speech_mask refers to
+    :return: List of (audio chunk, speech mask chunk) tuples in order
+    """
+    frame_size = int(sample_rate * (frame_duration_ms / 1000.0))
+    frame_count = min(len(speech_mask), len(audio_data) // frame_size)
+    max_frames = max(2, int(max_chunk_duration * 1000 / frame_duration_ms))
+    mask = np.asarray(speech_mask[:frame_count], dtype=bool)
+
+    cuts = [0]
+    while frame_count - cuts[-1] > max_frames:
+        search_start = cuts[-1] + max_frames // 2
+        window = mask[search_start:cuts[-1] + max_frames]
+        edges = np.diff(np.concatenate(([1], window.astype(np.int8), [1])))
+        pause_starts, pause_ends = np.flatnonzero(edges == -1), np.flatnonzero(edges == 1)
+        if len(pause_starts):
+            longest = len(pause_starts) - 1 - np.argmax((pause_ends - pause_starts)[::-1])
+            cuts.append(search_start + (pause_starts[longest] + pause_ends[longest]) // 2)
+        else:
+            cuts.append(cuts[-1] + max_frames)
+    cuts.append(frame_count)
+
+    chunks = []
+    for start, end in zip(cuts, cuts[1:]):
+        # The last chunk also takes the samples after the last whole frame
+        end_sample = end * frame_size if end < frame_count else len(audio_data)
+        chunks.append((audio_data[start * frame_size:end_sample], mask[start:end]))
+    return chunks
@@ -0,0 +1,63 @@
+"""
+Capture buffer benchmark for WhisperWriter.
+
+Feeds a synthetic stream through a FrameQueue and compares collecting it in an AudioBuffer with the
+old approach of extending a Python list sample by sample. Reports the time, throughput and peak
+memory of each:
+
+    python src/capture_benchmark.py --minutes 30
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+
+from audio_buffer import AudioBuffer, FrameQueue
+
+
+def run_list_capture(block, frame_count):
+    """Collect the stream the old way, as a list of Python integers converted at the end."""
+    recording = []
+    for _ in range(frame_count):
+        frame = np.array(list(block), dtype=np.int16)
+        recording.extend(frame)
+    return np.array(recording, dtype=np.int16)
+
+
+def run_buffer_capture(block, frame_count, sample_rate):
+    """Collect the stream through a FrameQueue into an AudioBuffer."""
+    frame_queue = FrameQueue(len(block), sample_rate)
+    recording = AudioBuffer(sample_rate * 60)
+    for _ in range(frame_count):
+        frame_queue.put(block.copy())
+        recording.append(frame_queue.get_frame())
+    return recording.get_audio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare capture buffer memory use and throughput.')
+    parser.add_argument('--minutes', type=float, default=30.0, help='Length of the synthetic stream')
+    parser.add_argument('--sample-rate', type=int, default=16000)
+    args = parser.parse_args()
+
+    frame_size = int(args.sample_rate * 0.03)
+    frame_count = int(args.minutes * 60 * args.sample_rate / frame_size)
+    block = (np.random.default_rng(0).standard_normal(frame_size) * 1000).astype(np.int16)
+
+    print(f'Synthetic stream: {args.minutes:g} minutes, {frame_count} frames of {frame_size} samples')
+    captures = (('list', lambda: run_list_capture(block, frame_count)),
+                ('AudioBuffer', lambda: run_buffer_capture(block, frame_count, args.sample_rate)))
+    for name, capture in captures:
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        audio = capture()
+        elapsed = time.perf_counter() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'{name:>12}: {elapsed:7.2f} s, {audio.size / elapsed / 1e6:8.2f} Msamples/s, '
+              f'peak {peak / 2**20:9.1f} MiB')
+        del audio
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import CancelledError
+
+from transcription import transcribe_raw, select_backend
+from utils import ConfigManager
+
+
+class ChunkTranscriber:
+    """
+    Transcribes chunks of a recording on a background thread while recording continues.
+
+    Chunks are transcribed one at a time in the order they were submitted, so the joined text is
+    always in the order it was spoken.
+    """
+
+    def __init__(self, model_manager=None, on_partial=None, cancel_event=None):
+        """
+        Initialize the ChunkTranscriber and start its worker thread.
+
+        :param model_manager: ModelManager providing the local model (if applicable)
+        :param on_partial: Optional callable that receives the text of each chunk as it is transcribed
+        :param cancel_event: Optional threading.Event that also cancels the chunk being transcribed when set
+        """
+        self.model_manager = model_manager
+        self.on_partial = on_partial
+        self.cancel_event = cancel_event
+        self.chunk_count = 0
+        self._queue = queue.Queue()
+        self._texts = []
+        self._error = None
+        self._cancelled = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, audio_data, speech_mask=None):
+        """Queue a chunk of int16 audio, with its optional per-frame speech mask, for transcription."""
+        self.chunk_count += 1
+        self._queue.put((audio_data, speech_mask))
+
+    def finish(self):
+        """
+        Wait for all submitted chunks to be transcribed.
+
+        :return: The raw transcription of all chunks, joined in order
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self._error:
+            raise self._error
+        return ' '.join(self._texts)
+
+    def cancel(self):
+        """Stop transcribing without waiting for the chunks that are still queued."""
+        self._cancelled = True
+        self._queue.put(None)
+
+    def _run(self):
+        """Transcribe queued chunks until finish or cancel is called."""
+        while True:
+            chunk = self._queue.get()
+            if chunk is None or self._cancelled:
+                return
+            if self._error:
+                continue
+
+            try:
+                # Chunks recorded while the model is still loading wait here until it is ready
+                local_model = None
+                get_fallback_model = None
+                if self.model_manager:
+                    sample_rate = ConfigManager.get_config_value('recording_options', 'sample_rate') or 16000
+                    duration = len(chunk[0]) / sample_rate
+                    if select_backend(duration) == 'local':
+                        local_model = self.model_manager.select_model(duration, self.cancel_event)
+                    get_fallback_model = lambda: self.model_manager.get_fallback_model(self.cancel_event)
+                text = transcribe_raw(*chunk, local_model=local_model, get_fallback_model=get_fallback_model,
+                                      cancel_event=self.cancel_event).strip()
+            except CancelledError as e:
+                self._error = e
+                continue
+            except Exception as e:
+                traceback.print_exc()
+                self._error = e
+                continue
+
+            if not text:
+                continue
+            self._texts.append(text)
+            ConfigManager.console_print(f'Chunk {len(self._texts)} transcribed: {text}')
+            if self.on_partial:
+                self.on_partial(text)
@@ -1,8 +1,9 @@
 import subprocess
 import os
 import signal
+import sys
 import time
-from pynput.keyboard import Controller as PynputController
+from pynput.keyboard import Controller as PynputController, Key
 
 from utils import ConfigManager
 
@@ -24,15 +25,21 @@ class InputSimulator:
     A class to simulate keyboard input using various methods.
     """
 
-    def __init__(self):
+    def __init__(self, keyboard=None):
         """
         Initialize the InputSimulator with the specified configuration.
+
+        Args:
+            keyboard: Optional keyboard controller used instead of pynput's with the pynput input method,
+                for example in benchmarks.
         """
         self.input_method = ConfigManager.get_config_value('post_processing', 'input_method')
         self.dotool_process = None
+        self.clipboard = None  # pyperclip, imported when text is first pasted
+        self.burst_delay = 0.0
 
         if self.input_method == 'pynput':
-            self.keyboard = PynputController()
+            self.keyboard = keyboard or PynputController()
         elif self.input_method == 'dotool':
             self._initialize_dotool()
 
@@ -51,33 +58,273 @@ class InputSimulator:
             os.kill(self.dotool_process.pid, signal.SIGINT)
             self.dotool_process = None
 
-    def typewrite(self, text):
+    # Number of characters typed with pynput between progress reports
+    progress_interval = 50
+
+    # Characters sent without pausing in each burst, and the longest pause between bursts in seconds
+    burst_size = 25
+    max_burst_delay = 0.05
+
+    # Bursts are at most this many times faster than typing key by key with writing_key_press_delay,
+    # since injected keystrokes return immediately whether or not the target has processed them
+    max_burst_speedup = 5
+
+    # A burst is considered held back by the target when its keystrokes take this many times longer
+    # to inject than the fastest burst so far
+    backpressure_ratio = 3.0
+
+    # Seconds to wait after pasting before the previous clipboard contents are restored
+    paste_restore_delay = 0.2
+
+    def select_strategy(self, text):
+        """
+        Return how the given text should be entered, according to typing_strategy.
+
+        With the auto strategy, short text is typed key by key, medium text in bursts and long text is
+        pasted from the clipboard. Bursts are only used with pynput.
+
+        Args:
+            text (str): The text to enter.
+
+        Returns:
+            str: 'keys', 'burst' or 'paste'.
+        """
+        post_processing = ConfigManager.get_snapshot('post_processing')
+        strategy = post_processing.get('typing_strategy') or 'keys'
+        if strategy == 'auto':
+            if len(text) >= (post_processing.get('paste_min_length') or float('inf')):
+                strategy = 'paste'
+            elif len(text) >= (post_processing.get('burst_min_length') or float('inf')):
+                strategy = 'burst'
+            else:
+                strategy = 'keys'
+        if strategy == 'burst' and self.input_method != 'pynput':
+            strategy = 'keys'
+        return strategy
+
+    def typewrite(self, text, cancel_event=None, on_progress=None):
         """
         Simulate typing the given text with the specified interval between keystrokes.
 
         Args:
             text (str): The text to type.
+            cancel_event (threading.Event): Optional event that stops typing when set. Only pynput
+                can stop in the middle of the text.
+            on_progress (callable): Optional callable that receives the number of characters typed
+                so far and the length of the text.
+
+        Returns:
+            int: The number of characters typed.
+        """
+        interval = ConfigManager.get_snapshot('post_processing').writing_key_press_delay
+        strategy = self.select_strategy(text)
+        start_time = time.perf_counter()
+        if strategy == 'paste':
+            try:
+                typed = self._paste(text)
+            except Exception as e:
+                ConfigManager.console_print(f'Pasting failed ({e}). Typing the text key by key instead.')
+                strategy = 'keys'
+                typed = self._typewrite_keys(text, interval, cancel_event, on_progress)
+            else:
+                if on_progress:
+                    on_progress(typed, len(text))
+        elif strategy == 'burst':
+            typed = self._typewrite_bursts(text, interval, cancel_event, on_progress)
+        else:
+            typed = self._typewrite_keys(text, interval, cancel_event, on_progress)
+        elapsed = time.perf_counter() - start_time
+        if typed:
+            ConfigManager.console_print(f'Entered {typed} characters by {strategy} in {elapsed:.2f} seconds '
+                                        f'({typed / max(elapsed, 1e-6):.0f} characters per second).')
+        return typed
+
+    def _typewrite_keys(self, text, interval, cancel_event=None, on_progress=None):
+        """
+        Type the text one key at a time with the configured input method.
+
+        Args:
+            text (str): The text to type.
+            interval (float): The interval between keystrokes in seconds.
+            cancel_event (threading.Event): Optional event that stops typing when set.
+            on_progress (callable): Optional callable that receives the number of characters typed and the total.
+
+        Returns:
+            int: The number of characters typed.
         """
-        interval = ConfigManager.get_config_value('post_processing', 'writing_key_press_delay')
         if self.input_method == 'pynput':
-            self._typewrite_pynput(text, interval)
-        elif self.input_method == 'ydotool':
+            return self._typewrite_pynput(text, interval, cancel_event, on_progress)
+        if self.input_method == 'ydotool':
             self._typewrite_ydotool(text, interval)
         elif self.input_method == 'dotool':
             self._typewrite_dotool(text, interval)
+        if on_progress:
+            on_progress(len(text), len(text))
+        return len(text)
+
+    def replace_text(self, old_text, new_text):
+        """
+        Replace text that was just typed by erasing the part that differs and typing the rest.
+
+        Args:
+            old_text (str): The text that was typed last.
+            new_text (str): The text that should replace it.
+        """
+        common_length = len(os.path.commonprefix([old_text, new_text]))
+        self.erase(len(old_text) - common_length)
+        if new_text[common_length:]:
+            self.typewrite(new_text[common_length:])
+
+    def erase(self, count):
+        """
+        Simulate pressing backspace the given number of times.
 
-    def _typewrite_pynput(self, text, interval):
+        Args:
+            count (int): The number of characters to erase.
+        """
+        if count <= 0:
+            return
+        interval = ConfigManager.get_snapshot('post_processing').writing_key_press_delay
+        if self.input_method == 'pynput':
+            for _ in range(count):
+                self.keyboard.press(Key.backspace)
+                self.keyboard.release(Key.backspace)
+                time.sleep(interval)
+        elif self.input_method == 'ydotool':
+            # 14 is the Linux input event code of the backspace key
+            run_command_or_exit_on_failure([
+                "ydotool",
+                "key",
+                "--key-delay",
+                str(interval * 1000),
+            ] + ["14:1", "14:0"] * count)
+        elif self.input_method == 'dotool':
+            assert self.dotool_process and self.dotool_process.stdin
+            self.dotool_process.stdin.write(f"keydelay {interval * 1000}\n")
+            self.dotool_process.stdin.write("key" + " backspace" * count + "\n")
+            self.dotool_process.stdin.flush()
+
+    def _typewrite_pynput(self, text, interval, cancel_event=None, on_progress=None):
         """
         Simulate typing using pynput.
 
         Args:
             text (str): The text to type.
             interval (float): The interval between keystrokes in seconds.
+            cancel_event (threading.Event): Optional event that stops typing when set.
+            on_progress (callable): Optional callable that receives the number of characters typed and the total.
+
+        Returns:
+            int: The number of characters typed.
         """
-        for char in text:
+        for typed, char in enumerate(text):
+            if cancel_event is not None and cancel_event.is_set():
+                return typed
+            if on_progress and typed % self.progress_interval == 0:
+                on_progress(typed, len(text))
             self.keyboard.press(char)
             self.keyboard.release(char)
             time.sleep(interval)
+        if on_progress:
+            on_progress(len(text), len(text))
+        return len(text)
+
+    def _typewrite_bursts(self, text, interval, cancel_event=None, on_progress=None):
+        """
+        Type text with pynput in bursts of burst_size keystrokes without pausing between keys.
+
+        The target cannot tell which keystrokes it received, so a burst whose keystrokes take much
+        longer to inject than the fastest burst so far is taken as a sign that the target is falling
+        behind: the pause between bursts is doubled, and it shrinks again while bursts stay fast. It
+        never shrinks below the pause that keeps bursts within max_burst_speedup of typing key by key.
+
+        Args:
+            text (str): The text to type.
+            interval (float): The interval between keystrokes in seconds when typing key by key.
+            cancel_event (threading.Event): Optional event that stops typing when set.
+            on_progress (callable): Optional callable that receives the number of characters typed and the total.
+
+        Returns:
+            int: The number of characters typed.
+        """
+        fastest_key_time = None
+        for start in range(0, len(text), self.burst_size):
+            if cancel_event is not None and cancel_event.is_set():
+                return start
+            if on_progress:
+                on_progress(start, len(text))
+
+            burst = text[start:start + self.burst_size]
+            burst_start = time.perf_counter()
+            for char in burst:
+                self.keyboard.press(char)
+                self.keyboard.release(char)
+            key_time = (time.perf_counter() - burst_start) / len(burst)
+
+            if fastest_key_time is None or key_time < fastest_key_time:
+                fastest_key_time = key_time
+            min_delay = interval * len(burst) / self.max_burst_speedup
+            if key_time > fastest_key_time * self.backpressure_ratio:
+                self.burst_delay = min(max(self.max_burst_delay, min_delay), max(self.burst_delay * 2, 0.002))
+            else:
+                self.burst_delay *= 0.5
+            self.burst_delay = max(self.burst_delay, min_delay)
+            time.sleep(self.burst_delay)
+        if on_progress:
+            on_progress(len(text), len(text))
+        return len(text)
+
+    def _paste(self, text):
+        """
+        Enter text by pasting it from the clipboard, restoring the previous clipboard text afterwards.
+
+        Only text can be restored; other clipboard contents, such as images, are lost.
+
+        Args:
+            text (str): The text to paste.
+
+        Returns:
+            int: The number of characters pasted.
+
+        Raises:
+            Exception: If the text could not be put on the clipboard, for example because no clipboard
+                tool is installed. Nothing has been pasted in that case.
+        """
+        if self.clipboard is None:
+            import pyperclip
+            self.clipboard = pyperclip
+        try:
+            previous = self.clipboard.paste()
+        except Exception:
+            previous = None
+        self.clipboard.copy(text)
+        try:
+            self._press_paste_shortcut()
+            # Give the target time to read the clipboard before it is restored
+            time.sleep(self.paste_restore_delay)
+        finally:
+            if previous is not None:
+                try:
+                    self.clipboard.copy(previous)
+                except Exception as e:
+                    ConfigManager.console_print(f'Failed to restore the clipboard: {e}')
+        return len(text)
+
+    def _press_paste_shortcut(self):
+        """
+        Press Ctrl+V, or Cmd+V on macOS, with the configured input method.
+        """
+        if self.input_method == 'pynput':
+            with self.keyboard.pressed(Key.cmd if sys.platform == 'darwin' else Key.ctrl):
+                self.keyboard.press('v')
+                self.keyboard.release('v')
+        elif self.input_method == 'ydotool':
+            # 29 and 47 are the Linux input event codes of the left control and V keys
+            run_command_or_exit_on_failure(["ydotool", "key", "29:1", "47:1", "47:0", "29:0"])
+        elif self.input_method == 'dotool':
+            assert self.dotool_process and self.dotool_process.stdin
+            self.dotool_process.stdin.write("key ctrl+v\n")
+            self.dotool_process.stdin.flush()
 
     def _typewrite_ydotool(self, text, interval):
         """
@@ -1,19 +1,17 @@
 import os
 import sys
 import time
-from audioplayer import AudioPlayer
-from pynput.keyboard import Controller
-from PyQt5.QtCore import QObject, QProcess
+from dotenv import load_dotenv
+from PyQt5.QtCore import Qt, QObject, QFileSystemWatcher, QTimer
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QAction, QMessageBox
 
+from audio_capture import AudioCaptureService
 from key_listener import KeyListener
-from result_thread import ResultThread
 from ui.main_window import MainWindow
-from ui.settings_window import SettingsWindow
-from ui.status_window import StatusWindow
-from transcription import create_local_model
-from input_simulation import InputSimulator
+from model_manager import ModelManager
+from typing_worker import TypingWorker
+from transcription import uses_local_model, language_cache
 from utils import ConfigManager
 
 
@@ -23,47 +21,65 @@ class WhisperWriterApp(QObject):
         Initialize the application, opening settings window if no configuration file is found.
         """
         super().__init__()
+        self.start_time = time.perf_counter()
         self.app = QApplication(sys.argv)
         self.app.setWindowIcon(QIcon(os.path.join('assets', 'ww-logo.png')))
 
+        load_dotenv()
         ConfigManager.initialize()
 
-        self.settings_window = SettingsWindow()
-        self.settings_window.settings_closed.connect(self.on_settings_closed)
-        self.settings_window.settings_saved.connect(self.restart_app)
+        # The settings and status windows are created when they are first shown and deleted when closed
+        self.settings_window = None
+        self.status_window = None
+
+        # Edits made to the config file outside the settings window are applied as soon as the file changes
+        self.config_watcher = QFileSystemWatcher()
+        self.config_watcher.fileChanged.connect(self.on_config_file_changed)
 
         if ConfigManager.config_file_exists():
             self.initialize_components()
         else:
             print('No valid configuration file found. Opening settings window...')
-            self.settings_window.show()
+            self.show_settings_window()
 
     def initialize_components(self):
         """
         Initialize the components of the application.
         """
-        self.input_simulator = InputSimulator()
+        # Sections changed by saving or reloading the configuration are applied once all of them have been published
+        self.components_initialized = True
+        self.pending_changes = set()
+        self.apply_scheduled = False
+        ConfigManager.subscribe(self.on_config_section_changed)
+        self.watch_config_file()
+
+        # Results are typed on a worker thread, so long text does not block the GUI thread
+        self.typing_worker = TypingWorker()
+        self.typing_worker.cancelledSignal.connect(self.on_typing_cancelled)
+        self.typing_worker.start()
 
         self.key_listener = KeyListener()
         self.key_listener.add_callback("on_activate", self.on_activation)
         self.key_listener.add_callback("on_deactivate", self.on_deactivation)
 
-        model_options = ConfigManager.get_config_section('model_options')
-        model_path = model_options.get('local', {}).get('model_path')
-        self.local_model = create_local_model() if not model_options.get('use_api') else None
+        self.model_manager = ModelManager(self.start_time)
 
         self.result_thread = None
+        self.streamed_text = ''
 
         self.main_window = MainWindow()
-        self.main_window.openSettings.connect(self.settings_window.show)
+        self.main_window.openSettings.connect(self.show_settings_window)
         self.main_window.startListening.connect(self.key_listener.start)
         self.main_window.closeApp.connect(self.exit_app)
-
-        if not ConfigManager.get_config_value('misc', 'hide_status_window'):
-            self.status_window = StatusWindow()
+        self.model_manager.stateChanged.connect(self.main_window.setModelStatus)
 
         self.create_tray_icon()
         self.main_window.show()
+        ConfigManager.console_print(f'Main window shown {time.perf_counter() - self.start_time:.2f} seconds after startup.')
+
+        # Load the local model in the background; recordings made before it is ready wait for it
+        if uses_local_model():
+            self.model_manager.load_async()
 
     def create_tray_icon(self):
         """
@@ -78,7 +94,7 @@ class WhisperWriterApp(QObject):
         tray_menu.addAction(show_action)
 
         settings_action = QAction('Open Settings', self.app)
-        settings_action.triggered.connect(self.settings_window.show)
+        settings_action.triggered.connect(self.show_settings_window)
         tray_menu.addAction(settings_action)
 
         exit_action = QAction('Exit', self.app)
@@ -91,8 +107,9 @@ class WhisperWriterApp(QObject):
     def cleanup(self):
         if self.key_listener:
             self.key_listener.stop()
-        if self.input_simulator:
-            self.input_simulator.cleanup()
+        if self.typing_worker:
+            self.typing_worker.stop()
+        AudioCaptureService.shutdown()
 
     def exit_app(self):
         """
@@ -101,11 +118,126 @@ class WhisperWriterApp(QObject):
         self.cleanup()
         QApplication.quit()
 
-    def restart_app(self):
-        """Restart the application to apply the new settings."""
-        self.cleanup()
-        QApplication.quit()
-        QProcess.startDetached(sys.executable, sys.argv)
+    def apply_settings(self):
+        """
+        Apply saved settings in place, reconfiguring only the components whose settings changed.
+
+        A changed local model is loaded in the background while the current one keeps transcribing.
+        """
+        self.apply_scheduled = False
+        changed, self.pending_changes = self.pending_changes, set()
+        if not changed:
+            return
+        ConfigManager.console_print(f"Applying changed settings: {', '.join('.'.join(key) for key in sorted(changed))}")
+        changed_recording_options = {key[1] for key in changed if key[0] == 'recording_options'}
+        changed_local_options = {key[2] for key in changed if key[:2] == ('model_options', 'local')}
+
+        if changed_recording_options:
+            # The next recording picks up the new recording options
+            self.stop_result_thread()
+            if 'activation_key' in changed_recording_options:
+                self.key_listener.update_activation_keys()
+            if 'input_backend' in changed_recording_options:
+                self.key_listener.stop()
+                self.key_listener.update_backend()
+                self.key_listener.start()
+            if changed_recording_options & {'sample_rate', 'sound_device', 'preroll_duration', 'keep_audio_stream_open'}:
+                AudioCaptureService.shutdown()
+
+        if ('model_options', 'common', 'language') in changed or changed_local_options & {'model', 'model_path'}:
+            # The language detected for the session may not hold for the new language setting or model
+            language_cache.reset()
+
+        backend_changed = any(key[:2] in (('model_options', 'use_api'), ('model_options', 'fallback')) for key in changed)
+        if not uses_local_model():
+            if backend_changed and self.model_manager.state != 'unloaded':
+                self.model_manager.unload()
+        elif (self.model_manager.state == 'unloaded'
+              or changed_local_options & {'model', 'model_path', 'device', 'compute_type',
+                                           'cpu_threads', 'num_workers', 'parallel_transcription'}):
+            self.model_manager.load_async()
+
+    def on_config_section_changed(self, section_name, snapshot, previous):
+        """
+        Collect the keys of a saved or reloaded configuration section that changed, and schedule applying them.
+        """
+        self.pending_changes |= ConfigManager.get_changed_keys(previous or {}, snapshot, (section_name,))
+        if not self.apply_scheduled:
+            self.apply_scheduled = True
+            QTimer.singleShot(0, self.apply_settings)
+
+    def on_settings_saved(self):
+        """
+        Initialize the components when settings are saved for the first time. Later changes are applied
+        through the configuration subscription.
+        """
+        if not getattr(self, 'components_initialized', False):
+            self.initialize_components()
+        else:
+            self.watch_config_file()
+
+    def watch_config_file(self):
+        """Watch the config file for changes, if it exists."""
+        config_path = os.path.join('src', 'config.yaml')
+        if os.path.isfile(config_path) and config_path not in self.config_watcher.files():
+            self.config_watcher.addPath(config_path)
+
+    def on_config_file_changed(self, path):
+        """
+        Reload and apply the configuration after the config file was changed outside the settings window.
+        """
+        # Editors that save by replacing the file remove it from the watcher
+        self.watch_config_file()
+        if not getattr(self, 'components_initialized', False) or self.settings_window is not None:
+            # Unsaved changes in the settings window are not overwritten; saving them applies them
+            return
+        # Changed sections are applied through the configuration subscription
+        ConfigManager.reload_config()
+
+    def show_settings_window(self):
+        """
+        Show the settings window, creating it first if it is not open.
+        """
+        if self.settings_window is None:
+            from ui.settings_window import SettingsWindow
+            self.settings_window = SettingsWindow()
+            self.settings_window.setAttribute(Qt.WA_DeleteOnClose)
+            self.settings_window.settings_closed.connect(self.on_settings_closed)
+            self.settings_window.settings_saved.connect(self.on_settings_saved)
+            self.settings_window.destroyed.connect(self.on_settings_window_destroyed)
+        self.settings_window.show()
+        self.settings_window.raise_()
+        self.settings_window.activateWindow()
+
+    def on_settings_window_destroyed(self):
+        """Forget the settings window once it has been deleted after closing."""
+        self.settings_window = None
+
+    def get_status_window(self):
+        """
+        Return the status window, creating it if it is not open.
+        """
+        if self.status_window is None:
+            from ui.status_window import StatusWindow
+            self.status_window = StatusWindow()
+            self.status_window.setAttribute(Qt.WA_DeleteOnClose)
+            self.status_window.closeSignal.connect(self.on_status_window_closed)
+        return self.status_window
+
+    def on_status(self, status):
+        """
+        Show the status of the result thread in the status window.
+        """
+        if status in ('idle', 'error', 'cancel') and self.status_window is None:
+            return
+        self.get_status_window().updateStatus(status)
+
+    def on_status_window_closed(self):
+        """
+        Forget the status window once it closes, and stop the result thread if it is still running.
+        """
+        self.status_window = None
+        self.stop_result_thread()
 
     def on_settings_closed(self):
         """
@@ -124,11 +256,16 @@ class WhisperWriterApp(QObject):
         Called when the activation key combination is pressed.
         """
         if self.result_thread and self.result_thread.isRunning():
+            if not self.result_thread.is_recording:
+                # Pressing the activation key while a recording is being transcribed cancels the transcription
+                # and the typing of any text it has streamed
+                self.stop_result_thread()
+                self.typing_worker.cancel()
+                return
             recording_mode = ConfigManager.get_config_value('recording_options', 'recording_mode')
-            if recording_mode == 'press_to_toggle':
+            if recording_mode in ('press_to_toggle', 'continuous'):
+                # In continuous mode, utterances that are still queued are transcribed before the thread finishes
                 self.result_thread.stop_recording()
-            elif recording_mode == 'continuous':
-                self.stop_result_thread()
             return
 
         self.start_result_thread()
@@ -148,13 +285,20 @@ class WhisperWriterApp(QObject):
         if self.result_thread and self.result_thread.isRunning():
             return
 
-        self.result_thread = ResultThread(self.local_model)
+        # Imported here so that the recording and transcription modules load after the main window is shown
+        from result_thread import ResultThread
+
+        # Text streamed by a cancelled transcription must not be mistaken for part of the next result
+        self.streamed_text = ''
+        self.result_thread = ResultThread(self.model_manager)
         if not ConfigManager.get_config_value('misc', 'hide_status_window'):
-            self.result_thread.statusSignal.connect(self.status_window.updateStatus)
-            self.status_window.closeSignal.connect(self.stop_result_thread)
+            self.result_thread.statusSignal.connect(self.on_status)
             # Connect output status signal to status window
             self.result_thread.outputStatusSignal.connect(self.on_output_status)
+            self.result_thread.partialResultSignal.connect(self.on_partial_result)
+        self.result_thread.segmentSignal.connect(self.on_transcription_segment)
         self.result_thread.resultSignal.connect(self.on_transcription_complete)
+        self.result_thread.correctionSignal.connect(self.on_transcription_corrected)
         self.result_thread.start()
 
     def stop_result_thread(self):
@@ -168,24 +312,60 @@ class WhisperWriterApp(QObject):
         if hasattr(self, 'voice_listener_thread') and self.voice_listener_thread and self.voice_listener_thread.isRunning():
             self.voice_listener_thread.stop()
 
+    def on_transcription_segment(self, text):
+        """
+        Type a piece of the transcription as soon as it has been decoded.
+        """
+        self.streamed_text += text
+        self.typing_worker.typewrite(text)
+
     def on_transcription_complete(self, result):
         """
-        When the transcription is complete, type the result and start listening for the activation key again.
+        When the transcription is complete, queue the result for typing and start listening for the activation key again.
+
+        The next recording can start while the result is still being typed.
         """
-        self.input_simulator.typewrite(result)
+        # Text that was streamed segment by segment has already been typed
+        if self.streamed_text and result.startswith(self.streamed_text):
+            result = result[len(self.streamed_text):]
+        self.streamed_text = ''
+        self.typing_worker.typewrite(result)
 
         if ConfigManager.get_config_value('misc', 'noise_on_completion'):
-            AudioPlayer(os.path.join('assets', 'beep.wav')).play(block=True)
+            # Played by the typing worker once the result has been typed
+            self.typing_worker.play_sound(os.path.join('assets', 'beep.wav'))
 
         recording_mode = ConfigManager.get_config_value('recording_options', 'recording_mode')
         if recording_mode == 'continuous':
-            self.start_result_thread()
+            # The result thread keeps recording the next utterance while this one is typed
+            pass
         elif recording_mode == 'auto_voice_activation':
             # Start a new thread that listens for voice and automatically begins recording
             self.start_voice_listener_thread()
         else:
             self.key_listener.start()
             
+    def on_transcription_corrected(self, draft, result):
+        """
+        When a draft transcription has been corrected by the main model, replace the typed draft.
+        """
+        self.typing_worker.replace_text(draft, result)
+
+    def on_typing_cancelled(self, dropped_characters):
+        """
+        Show in the status window that typing was cancelled.
+        """
+        if self.status_window is not None:
+            self.status_window.updateOutputStatus(f'Typing cancelled ({dropped_characters} characters not typed)',
+                                                  'error')
+
+    def on_partial_result(self, text):
+        """
+        Show text transcribed while still recording in streaming mode in the status window.
+        """
+        if text and self.status_window is not None:
+            self.status_window.appendPartialResult(text)
+
     def on_output_status(self, message, success):
         """
         Handle output status updates from the result thread.
@@ -194,7 +374,7 @@ class WhisperWriterApp(QObject):
             message (str): Status message about the output operation
             success (bool): Whether the operation was successful
         """
-        if not ConfigManager.get_config_value('misc', 'hide_status_window'):
+        if self.status_window is not None:
             # Update status window with output status
             status_type = "success" if success else "error"
             self.status_window.updateOutputStatus(message, status_type)
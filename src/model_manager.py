@@ -0,0 +1,348 @@
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import CancelledError
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from transcription import create_local_model, warm_up_local_model, language_cache
+from utils import ConfigManager
+
+# Approximate parameter counts in millions, used to estimate how much memory a model needs
+MODEL_PARAMETERS = {
+    'tiny': 39,
+    'base': 74,
+    'small': 244,
+    'medium': 769,
+    'large': 1550,
+}
+
+BYTES_PER_PARAMETER = {
+    'int8': 1,
+    'float16': 2,
+    'float32': 4,
+    'default': 4,
+}
+
+
+def estimate_model_size_mb(model_name, compute_type):
+    """
+    Estimate the memory used by a loaded model in megabytes.
+
+    Unknown models, such as custom model paths, are assumed to be as large as the large models.
+    """
+    base_name = model_name.split('.')[0].split('-')[0]
+    parameters = MODEL_PARAMETERS.get(base_name, MODEL_PARAMETERS['large'])
+    # Leave 20% on top of the weights for the runtime's own buffers
+    return int(parameters * BYTES_PER_PARAMETER.get(compute_type, 4) * 1.2)
+
+
+class ModelManager(QObject):
+    """
+    Loads and keeps the local Whisper models.
+
+    The configured model is loaded on a background thread so the UI and key listener can start
+    immediately. Transcriptions ask for a model through get_model or select_model, which wait until
+    loading has finished, so recordings made while the model is loading are transcribed as soon as it
+    is ready.
+
+    When routing is enabled, short clips are sent to a smaller, faster model, and with speculative drafts
+    the fast model provides a draft that the configured model later corrects. Additional models are
+    kept resident within a memory budget and the least recently used ones are evicted to make room.
+
+    Signals:
+        stateChanged: Emits the loading state of the configured model ('loading', 'ready' or 'error')
+    """
+
+    stateChanged = pyqtSignal(str)
+
+    def __init__(self, start_time=None):
+        """
+        Initialize the ModelManager.
+
+        :param start_time: time.perf_counter() value at application startup, used to report time-to-model-ready
+        """
+        super().__init__()
+        self.start_time = start_time if start_time is not None else time.perf_counter()
+        self.model = None
+        self.state = 'unloaded'
+        self._ready = threading.Event()
+        self._thread = None
+        self._loading = False
+        self._reload_pending = False
+        self._load_lock = threading.Lock()
+        # Incremented by unload, so that a load that was already running does not install its model
+        self._generation = 0
+        self._extra_models = OrderedDict()  # model name -> model, least recently used first
+        self._extra_models_lock = threading.Lock()
+        self._warm_up_times = {}
+        self._used_models = set()
+
+    def load_async(self):
+        """
+        Start loading the local model on a background thread.
+
+        If a model is already loaded, it keeps serving transcriptions until the new one is ready. If a
+        load is already running, the model is loaded again once it has finished.
+        """
+        with self._load_lock:
+            if self.model is None:
+                self._ready.clear()
+            self._set_state('loading')
+            if self._loading:
+                self._reload_pending = True
+                return
+            self._loading = True
+            self._thread = threading.Thread(target=self._run_loads, daemon=True)
+            self._thread.start()
+
+    def unload(self):
+        """Release all local models, for example after switching to the API."""
+        with self._load_lock:
+            self._generation += 1
+            self._reload_pending = False
+            with self._extra_models_lock:
+                self._extra_models.clear()
+            self.model = None
+            self._warm_up_times.clear()
+            self._used_models.clear()
+            self._ready.clear()
+            self._set_state('unloaded')
+
+    def is_ready(self):
+        """Return True if a model is available without waiting."""
+        return self._ready.is_set() and self.model is not None
+
+    # Seconds between checks for cancellation while waiting for the model to load
+    cancel_poll_interval = 0.05
+
+    def get_model(self, timeout=None, cancel_event=None):
+        """
+        Return the local model, waiting for it to finish loading if necessary.
+
+        :param timeout: Seconds to wait, or None to wait until loading has finished
+        :param cancel_event: Optional threading.Event that stops waiting when set
+        :return: The loaded model, or None if no model was requested or loading failed
+        :raises CancelledError: If cancel_event was set while waiting
+        """
+        if self.state == 'unloaded':
+            return None
+        if cancel_event is None:
+            self._ready.wait(timeout)
+            return self.model
+
+        end_time = time.perf_counter() + timeout if timeout is not None else None
+        while not self._ready.is_set():
+            if cancel_event.is_set():
+                raise CancelledError('Waiting for the local model was cancelled.')
+            poll_interval = self.cancel_poll_interval
+            if end_time is not None:
+                poll_interval = min(poll_interval, end_time - time.perf_counter())
+                if poll_interval <= 0:
+                    break
+            self._ready.wait(poll_interval)
+        return self.model
+
+    def get_fallback_model(self, cancel_event=None):
+        """
+        Return the configured model for transcribing clips the API could not, loading it first if needed.
+
+        :param cancel_event: Optional threading.Event that stops waiting for the model when set
+        :return: The loaded model, or None if loading failed
+        """
+        if self.state == 'unloaded':
+            self.load_async()
+        return self.get_model(cancel_event=cancel_event)
+
+    def select_model(self, duration, cancel_event=None):
+        """
+        Return the model that should transcribe a clip, according to the routing policy.
+
+        Clips no longer than routing.short_clip_duration go to routing.fast_model, unless it cannot
+        transcribe the configured or detected language.
+
+        :param duration: Duration of the clip in seconds
+        :param cancel_event: Optional threading.Event that stops waiting for the model when set
+        :return: The selected model, or None if no model was requested or loading failed
+        """
+        routing = ConfigManager.get_config_section('model_options', 'routing')
+        if not routing.get('enabled') or duration > (routing.get('short_clip_duration') or 0):
+            return self.get_model(cancel_event=cancel_event)
+        return self._get_fast_model() or self.get_model(cancel_event=cancel_event)
+
+    def get_draft_model(self):
+        """
+        Return the fast model used for speculative drafts.
+
+        :return: The fast model, or None if speculative drafts are disabled or the fast model cannot be used
+        """
+        if not ConfigManager.get_config_value('model_options', 'routing', 'speculative_drafts'):
+            return None
+        return self._get_fast_model()
+
+    def get_extra_model(self, model_name):
+        """
+        Return a model other than the configured one, loading it if it is not resident.
+
+        Least recently used models are evicted so that all resident models fit in routing.memory_budget.
+        The configured model is never evicted.
+
+        :param model_name: Name of the faster-whisper model
+        """
+        with self._extra_models_lock:
+            if model_name in self._extra_models:
+                self._extra_models.move_to_end(model_name)
+                return self._extra_models[model_name]
+
+            compute_type = ConfigManager.get_config_value('model_options', 'local', 'compute_type')
+            budget_mb = ConfigManager.get_config_value('model_options', 'routing', 'memory_budget') or 0
+            needed_mb = estimate_model_size_mb(model_name, compute_type)
+            while self._extra_models and self._resident_size_mb(compute_type) + needed_mb > budget_mb:
+                evicted_name, evicted_model = self._extra_models.popitem(last=False)
+                self._forget(evicted_model)
+                ConfigManager.console_print(f'Evicted {evicted_name} model to stay within the memory budget.')
+            if self._resident_size_mb(compute_type) + needed_mb > budget_mb:
+                ConfigManager.console_print(f'Warning: loading {model_name} exceeds the memory budget of {budget_mb} MB.')
+
+            model = create_local_model(model_name)
+            if ConfigManager.get_config_value('model_options', 'local', 'warm_up'):
+                self._warm_up_times[id(model)] = warm_up_local_model(model)
+            self._extra_models[model_name] = model
+            ConfigManager.console_print(f'Resident models: {self._describe_resident_models(compute_type)}')
+            return model
+
+    def take_first_use(self, model):
+        """
+        Return True the first time it is called for a model, so its first inference can be reported.
+        """
+        if id(model) in self._used_models:
+            return False
+        self._used_models.add(id(model))
+        return True
+
+    def get_warm_up_time(self, model):
+        """Return how long the warm-up pass of a model took, or None if it was not warmed up."""
+        return self._warm_up_times.get(id(model))
+
+    def _run_loads(self):
+        """
+        Load the configured model, then preload the fast model, and repeat while load_async was called again.
+        """
+        while True:
+            with self._load_lock:
+                self._reload_pending = False
+                generation = self._generation
+            self._load(generation)
+
+            # Load the fast model now, so that the first short clip or draft does not have to wait for it
+            routing = ConfigManager.get_config_section('model_options', 'routing')
+            if (not self._reload_pending and self.model is not None
+                    and (routing.get('enabled') or routing.get('speculative_drafts'))):
+                self._get_fast_model()
+
+            with self._load_lock:
+                if not self._reload_pending:
+                    # Options did not change again while loading
+                    self._loading = False
+                    return
+
+    def _load(self, generation):
+        """
+        Create and optionally warm up the local model, and report how long it took to become ready.
+
+        :param generation: Value of the load generation when the load started; the model is discarded
+                           if unload was called in the meantime
+        """
+        load_start = time.perf_counter()
+        try:
+            model = create_local_model()
+            warm_up_time = None
+            if ConfigManager.get_config_value('model_options', 'local', 'warm_up'):
+                warm_up_time = warm_up_local_model(model)
+        except Exception:
+            traceback.print_exc()
+            with self._load_lock:
+                if generation != self._generation:
+                    self._release_waiters()
+                    return
+                if self.model is None:
+                    ConfigManager.console_print('Failed to load the local model.')
+                    self._set_state('error')
+                else:
+                    ConfigManager.console_print('Failed to load the new local model. Keeping the previous one.')
+                    self._set_state('ready')
+                self._ready.set()
+            return
+
+        with self._load_lock:
+            if generation != self._generation:
+                ConfigManager.console_print('The local model was unloaded while it was loading. Discarding it.')
+                self._release_waiters()
+                return
+            # Swap in the new model; extra models may have been built with outdated options
+            if warm_up_time is not None:
+                self._warm_up_times[id(model)] = warm_up_time
+            previous_model, self.model = self.model, model
+            if previous_model is not None:
+                self._forget(previous_model)
+                with self._extra_models_lock:
+                    self._extra_models.clear()
+            now = time.perf_counter()
+            ConfigManager.console_print(f'Model ready {now - self.start_time:.2f} seconds after startup '
+                                        f'(loading took {now - load_start:.2f} seconds).')
+            self._set_state('ready')
+            self._ready.set()
+
+    def _release_waiters(self):
+        """
+        Let get_model return after a load was discarded because of unload, unless another load follows.
+        """
+        if not self._reload_pending:
+            self._ready.set()
+
+    def _get_fast_model(self):
+        """
+        Return routing.fast_model, loading it if needed.
+
+        English-only fast models are only used for English: either it is the configured language, or no
+        language is configured and the language cache has locked onto English.
+
+        :return: The fast model, or None if it is not configured, not suitable or failed to load
+        """
+        fast_model = ConfigManager.get_config_value('model_options', 'routing', 'fast_model')
+        if not fast_model:
+            return None
+
+        language = ConfigManager.get_config_value('model_options', 'common', 'language') or language_cache.language
+        if fast_model.endswith('.en') and language != 'en':
+            return None
+
+        try:
+            return self.get_extra_model(fast_model)
+        except Exception:
+            traceback.print_exc()
+            ConfigManager.console_print(f'Failed to load {fast_model}. Using the configured model instead.')
+            return None
+
+    def _resident_size_mb(self, compute_type):
+        """Estimate the memory used by all resident models in megabytes."""
+        size_mb = 0
+        if self.model is not None:
+            local_options = ConfigManager.get_config_section('model_options', 'local')
+            size_mb += estimate_model_size_mb(local_options.get('model_path') or local_options.get('model') or '',
+                                              compute_type)
+        return size_mb + sum(estimate_model_size_mb(name, compute_type) for name in self._extra_models)
+
+    def _describe_resident_models(self, compute_type):
+        names = list(self._extra_models)
+        if self.model is not None:
+            names.insert(0, ConfigManager.get_config_value('model_options', 'local', 'model'))
+        return f"{', '.join(names)} (about {self._resident_size_mb(compute_type)} MB)"
+
+    def _forget(self, model):
+        self._warm_up_times.pop(id(model), None)
+        self._used_models.discard(id(model))
+
+    def _set_state(self, state):
+        self.state = state
+        self.stateChanged.emit(state)
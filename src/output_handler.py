@@ -22,6 +22,7 @@ class OutputHandler(QObject):
     def __init__(self):
         """Initialize the OutputHandler."""
         super().__init__()
+        self._last_file_write = None  # (file path, file size before the last write)
         self._initialize_settings()
         
     def _initialize_settings(self):
@@ -51,7 +52,7 @@ class OutputHandler(QObject):
         if not text:
             return False
             
-        output_options = ConfigManager.get_config_section('output_options')
+        output_options = ConfigManager.get_snapshot('output_options')
         success = True
         
         # Process clipboard output if enabled
@@ -65,6 +66,33 @@ class OutputHandler(QObject):
             success = success and file_success
             
         return success
+
+    def replace_output(self, old_text, new_text):
+        """
+        Replace previously output text with a corrected version.
+
+        The clipboard is overwritten and the last entry written to the output file is rewritten.
+
+        Args:
+            old_text (str): The text that was previously output
+            new_text (str): The text to output instead
+
+        Returns:
+            bool: True if all enabled outputs were successful, False otherwise
+        """
+        if not new_text or new_text == old_text:
+            return True
+
+        output_options = ConfigManager.get_snapshot('output_options')
+        success = True
+
+        if output_options.get('enable_clipboard', True):
+            success = self.copy_to_clipboard(new_text) and success
+
+        if output_options.get('enable_file_output', True):
+            success = self.replace_last_file_entry(new_text) and success
+
+        return success
             
     def copy_to_clipboard(self, text):
         """
@@ -99,8 +127,10 @@ class OutputHandler(QObject):
         Returns:
             bool: True if successful, False otherwise
         """
+        # If this write fails, a correction must not truncate the entry written before it
+        self._last_file_write = None
         try:
-            output_options = ConfigManager.get_config_section('output_options')
+            output_options = ConfigManager.get_snapshot('output_options')
             file_path = output_options.get('output_file_path', os.path.join('output', 'transcriptions.txt'))
             mode = output_options.get('file_output_mode', 'append')
             add_timestamp = output_options.get('add_timestamp', True)
@@ -119,6 +149,7 @@ class OutputHandler(QObject):
                 
             # Determine write mode
             write_mode = 'a' if mode == 'append' else 'w'
+            previous_size = os.path.getsize(file_path) if mode == 'append' and os.path.exists(file_path) else 0
             
             # Write to file
             with open(file_path, write_mode, encoding='utf-8') as f:
@@ -126,6 +157,7 @@ class OutputHandler(QObject):
                 if mode == 'append' and os.path.exists(file_path) and os.path.getsize(file_path) > 0:
                     f.write('\n')
                 f.write(content)
+            self._last_file_write = (file_path, previous_size)
                 
             success_msg = f"Text saved to {file_path} (mode: {mode})"
             ConfigManager.console_print(success_msg)
@@ -139,3 +171,27 @@ class OutputHandler(QObject):
             self.fileStatusSignal.emit(False, error_msg)
             return False
 
+    def replace_last_file_entry(self, text):
+        """
+        Replace the entry most recently written by save_to_file. If that write failed, the text is
+        saved as a new entry instead.
+
+        Args:
+            text (str): Text to write instead
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if self._last_file_write:
+            file_path, previous_size = self._last_file_write
+            try:
+                with open(file_path, 'r+b') as f:
+                    f.truncate(previous_size)
+            except Exception as e:
+                error_msg = f"Failed to replace file entry: {str(e)}"
+                ConfigManager.console_print(error_msg)
+                traceback.print_exc()
+                self.fileStatusSignal.emit(False, error_msg)
+                return False
+
+        return self.save_to_file(text)
@@ -1,15 +1,15 @@
+import queue
+import threading
 import time
 import traceback
-import numpy as np
-import sounddevice as sd
-import tempfile
-import wave
-import webrtcvad
+from concurrent.futures import CancelledError
 from PyQt5.QtCore import QThread, QMutex, pyqtSignal
-from collections import deque
-from threading import Event
 
-from transcription import transcribe
+from audio_buffer import AudioBuffer
+from audio_capture import AudioCaptureService
+from audio_encoder import UploadEncoder
+from chunk_transcriber import ChunkTranscriber
+from transcription import transcribe, transcribe_stream, post_process_transcription, select_backend
 from utils import ConfigManager
 from output_handler import OutputHandler
 
@@ -26,26 +26,35 @@ class ResultThread(QThread):
     5. Emitting the transcription result
 
     Signals:
-        statusSignal: Emits the current status of the thread (e.g., 'recording', 'transcribing', 'idle')
+        statusSignal: Emits the current status of the thread (e.g., 'recording', 'transcribing', 'correcting', 'idle')
         resultSignal: Emits the transcription result
+        segmentSignal: Emits each piece of post-processed text as soon as it is decoded, before resultSignal
+                       emits the whole result (segment streaming)
+        partialResultSignal: Emits the text of each chunk transcribed while recording (streaming mode)
+        correctionSignal: Emits a previously emitted draft result and the corrected text that replaces it
     """
 
     statusSignal = pyqtSignal(str)
     resultSignal = pyqtSignal(str)
+    segmentSignal = pyqtSignal(str)
+    partialResultSignal = pyqtSignal(str)
+    correctionSignal = pyqtSignal(str, str)  # draft, corrected text
     outputStatusSignal = pyqtSignal(str, bool)  # message, success flag
 
-    def __init__(self, local_model=None):
+    def __init__(self, model_manager=None):
         """
         Initialize the ResultThread.
 
-        :param local_model: Local transcription model (if applicable)
+        :param model_manager: ModelManager providing the local transcription model (if applicable)
         """
         super().__init__()
-        self.local_model = local_model
+        self.model_manager = model_manager
         self.is_recording = False
         self.is_running = True
         self.sample_rate = None
         self.mutex = QMutex()
+        # Set by stop to cancel the transcription in progress
+        self.cancel_event = threading.Event()
         
         # Initialize the output handler
         self.output_handler = OutputHandler()
@@ -61,12 +70,21 @@ class ResultThread(QThread):
         self.mutex.unlock()
 
     def stop(self):
-        """Stop the entire thread execution."""
+        """
+        Stop the entire thread execution.
+
+        A transcription in progress is cancelled: local decoding stops after the segment being decoded
+        and pending API requests are abandoned, so this only waits about as long as one segment takes.
+        """
+        cancel_start = time.perf_counter()
         self.mutex.lock()
         self.is_running = False
         self.mutex.unlock()
+        self.cancel_event.set()
         self.statusSignal.emit('idle')
         self.wait()
+        ConfigManager.console_print(f'Result thread stopped {(time.perf_counter() - cancel_start) * 1000:.0f} ms '
+                                    f'after it was cancelled.')
 
     def run(self):
         """Main execution method for the thread."""
@@ -78,44 +96,48 @@ class ResultThread(QThread):
             self.is_recording = True
             self.mutex.unlock()
 
-            self.statusSignal.emit('recording')
-            ConfigManager.console_print('Recording...')
-            audio_data = self._record_audio()
-
-            if not self.is_running:
-                return
+            recording_options = ConfigManager.get_config_section('recording_options')
 
-            if audio_data is None:
-                self.statusSignal.emit('idle')
+            if recording_options.get('recording_mode') == 'continuous':
+                self.statusSignal.emit('recording')
+                ConfigManager.console_print('Recording...')
+                frame_queue = AudioCaptureService.subscribe(include_preroll=True)
+                try:
+                    self._run_continuous(frame_queue)
+                finally:
+                    AudioCaptureService.unsubscribe(frame_queue)
                 return
 
-            self.statusSignal.emit('transcribing')
-            ConfigManager.console_print('Transcribing...')
-
-            # Time the transcription process
-            start_time = time.time()
-            result = transcribe(audio_data, self.local_model)
-            end_time = time.time()
+            chunk_transcriber = None
+            if recording_options.get('streaming_transcription'):
+                chunk_transcriber = ChunkTranscriber(self.model_manager, self.partialResultSignal.emit,
+                                                     self.cancel_event)
 
-            transcription_time = end_time - start_time
-            ConfigManager.console_print(f'Transcription completed in {transcription_time:.2f} seconds. Post-processed line: {result}')
+            self.statusSignal.emit('recording')
+            ConfigManager.console_print('Recording...')
+            frame_queue = AudioCaptureService.subscribe(include_preroll=True)
+            upload = None if chunk_transcriber else self._create_upload_encoder(frame_queue.sample_rate)
+            try:
+                audio_data, speech_mask = self._record_audio(frame_queue, chunk_transcriber, upload=upload)
+            finally:
+                AudioCaptureService.unsubscribe(frame_queue)
+            # Recording may also have stopped on silence; from here on the activation key cancels the
+            # transcription instead of stopping the recording
+            self.stop_recording()
 
-            if not self.is_running:
+            if not self.is_running or audio_data is None:
+                if chunk_transcriber:
+                    chunk_transcriber.cancel()
+                if upload:
+                    upload.cancel()
+                if audio_data is None:
+                    self.statusSignal.emit('idle')
                 return
-                
-            # Process the transcription through output handler
-            self.statusSignal.emit('processing_output')
-            ConfigManager.console_print('Processing output...')
-            
-            # Use the OutputHandler to handle the transcription result
-            output_success = self.output_handler.process_output(result)
-            
-            if not output_success:
-                ConfigManager.console_print('Warning: Some output operations failed')
-                
-            self.statusSignal.emit('idle')
-            self.resultSignal.emit(result)
 
+            self._transcribe_and_output(audio_data, speech_mask, chunk_transcriber, upload=upload)
+
+        except CancelledError:
+            ConfigManager.console_print('Transcription cancelled.')
         except Exception as e:
             traceback.print_exc()
             self.statusSignal.emit('error')
@@ -123,74 +145,351 @@ class ResultThread(QThread):
         finally:
             self.stop_recording()
 
-    def _record_audio(self):
+    def _run_continuous(self, frame_queue):
+        """
+        Record utterances back to back without closing the input stream, while a worker thread
+        transcribes them in the order they were spoken.
+
+        Recording continues until stop_recording is called. Utterances that are still queued then are
+        transcribed before the thread finishes; stop discards them.
+
+        :param frame_queue: FrameQueue fed by the open input stream
+        """
+        queue_size = ConfigManager.get_config_value('recording_options', 'continuous_queue_size') or 4
+        utterances = queue.Queue(maxsize=queue_size)
+        recording_finished = threading.Event()
+        worker = threading.Thread(target=self._transcription_worker, args=(utterances, recording_finished),
+                                  daemon=True)
+        worker.start()
+
+        skip_key_press = True
+        while self.is_running and self.is_recording:
+            upload = self._create_upload_encoder(frame_queue.sample_rate)
+            audio_data, speech_mask = self._record_audio(frame_queue, skip_key_press=skip_key_press, upload=upload)
+            skip_key_press = False
+            if audio_data is None or not self.is_running:
+                if upload:
+                    upload.cancel()
+                continue
+
+            self._queue_utterance(utterances, (audio_data, speech_mask, upload))
+
+        recording_finished.set()
+        if self.is_running:
+            ConfigManager.console_print(f'Recording stopped. Transcribing {utterances.qsize()} queued utterances...')
+        worker.join()
+
+        # Utterances left after the thread was stopped are discarded
+        while True:
+            try:
+                upload = utterances.get_nowait()[2]
+            except queue.Empty:
+                break
+            if upload:
+                upload.cancel()
+        if self.is_running:
+            self.statusSignal.emit('idle')
+
+    def _queue_utterance(self, utterances, utterance):
+        """
+        Queue an utterance for the transcription worker, waiting while the queue is full.
+
+        The input stream keeps filling the frame queue while this waits, so no speech is lost; the
+        following utterances are cut from the buffered audio once transcription has caught up.
+
+        :param utterances: Queue of recorded utterances to transcribe
+        :param utterance: Tuple of audio data, speech mask and upload encoder
+        """
+        try:
+            utterances.put_nowait(utterance)
+            return
+        except queue.Full:
+            pass
+
+        ConfigManager.console_print('Transcription is falling behind. Buffering speech until it catches up...')
+        self.outputStatusSignal.emit('Transcription is falling behind, speech is buffered', False)
+        while self.is_running:
+            try:
+                utterances.put(utterance, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        if utterance[2]:
+            utterance[2].cancel()
+
+    def _transcription_worker(self, utterances, recording_finished):
+        """
+        Transcribe queued utterances until recording has finished and the queue is empty, or the thread is stopped.
+
+        :param utterances: Queue of recorded utterances to transcribe
+        :param recording_finished: threading.Event set once no more utterances will be queued
+        """
+        while self.is_running:
+            try:
+                audio_data, speech_mask, upload = utterances.get(timeout=0.1)
+            except queue.Empty:
+                if recording_finished.is_set():
+                    return
+                continue
+
+            # While the microphone is still recording, the status window keeps showing that it is
+            still_recording = not recording_finished.is_set()
+            try:
+                self._transcribe_and_output(audio_data, speech_mask,
+                                            final_status='recording' if still_recording else None,
+                                            upload=upload, report_status=not still_recording)
+            except CancelledError:
+                ConfigManager.console_print('Transcription cancelled.')
+            except Exception as e:
+                traceback.print_exc()
+                self.outputStatusSignal.emit(f'Transcription failed: {e}', False)
+
+    def _transcribe_and_output(self, audio_data, speech_mask=None, chunk_transcriber=None, final_status='idle',
+                               upload=None, report_status=True):
+        """
+        Transcribe recorded audio, send the result through the output handler and emit it.
+
+        :param audio_data: numpy array of recorded audio
+        :param speech_mask: Per-frame VAD decisions for audio_data
+        :param chunk_transcriber: ChunkTranscriber that already holds the recording (streaming mode)
+        :param final_status: Status to emit once the result is ready, or None to emit no status
+        :param upload: UploadEncoder that encoded audio_data for the API while it was recorded
+        :param report_status: Whether to emit the transcribing and processing_output statuses
+        """
+        local_model = None
+        final_model = None
+        if not chunk_transcriber:
+            local_model = self._get_local_model(len(audio_data) / self.sample_rate)
+
+            # With speculative drafts, output a draft from the fast model first and correct it afterwards
+            if local_model is not None and local_model is self.model_manager.get_model(cancel_event=self.cancel_event):
+                draft_model = self.model_manager.get_draft_model()
+                if draft_model is not None:
+                    local_model, final_model = draft_model, local_model
+
+        if report_status:
+            self.statusSignal.emit('transcribing')
+        ConfigManager.console_print('Transcribing...')
+
+        # Time the transcription process
+        start_time = time.time()
+        if chunk_transcriber:
+            # Earlier chunks were transcribed while recording, so this only waits for the tail
+            result = post_process_transcription(chunk_transcriber.finish())
+        elif final_model is None and ConfigManager.get_config_value('post_processing', 'stream_segments'):
+            # Each piece is typed while the following segments are still being decoded
+            get_fallback_model = self._get_fallback_model if self.model_manager else None
+            pieces = []
+            for text in transcribe_stream(audio_data, local_model, speech_mask, upload, get_fallback_model,
+                                          self.cancel_event):
+                pieces.append(text)
+                self.segmentSignal.emit(text)
+            result = ''.join(pieces)
+        else:
+            get_fallback_model = self._get_fallback_model if self.model_manager else None
+            result = transcribe(audio_data, local_model, speech_mask, upload, get_fallback_model, self.cancel_event)
+        end_time = time.time()
+
+        transcription_time = end_time - start_time
+        timing_note = ''
+        if local_model is not None and self.model_manager.take_first_use(local_model):
+            warm_up_time = self.model_manager.get_warm_up_time(local_model)
+            if warm_up_time is not None:
+                timing_note = (f' (first inference on a warm model; the cold warm-up pass took '
+                               f'{warm_up_time:.2f} seconds)')
+            else:
+                timing_note = ' (first inference on a cold model)'
+        ConfigManager.console_print(f'Transcription completed in {transcription_time:.2f} seconds{timing_note}. Post-processed line: {result}')
+
+        if not self.is_running:
+            return
+
+        # Process the transcription through output handler
+        if report_status:
+            self.statusSignal.emit('processing_output')
+        ConfigManager.console_print('Processing output...')
+
+        # Use the OutputHandler to handle the transcription result
+        output_success = self.output_handler.process_output(result)
+
+        if not output_success:
+            ConfigManager.console_print('Warning: Some output operations failed')
+
+        if final_model is not None:
+            # The final status is held back until the draft is corrected, since 'idle' closes the status
+            # window, which stops this thread
+            if report_status:
+                self.statusSignal.emit('correcting')
+            self.resultSignal.emit(result)
+            self._correct_draft(audio_data, speech_mask, result, final_model)
+            if final_status is not None and self.is_running:
+                self.statusSignal.emit(final_status)
+            return
+
+        if final_status is not None:
+            self.statusSignal.emit(final_status)
+        self.resultSignal.emit(result)
+
+    def _correct_draft(self, audio_data, speech_mask, draft, final_model):
+        """
+        Transcribe the audio again with the main model and replace the draft if the text differs.
+
+        :param audio_data: numpy array of recorded audio
+        :param speech_mask: Per-frame VAD decisions for audio_data
+        :param draft: The draft result that was already output
+        :param final_model: The model whose transcription replaces the draft
+        """
+        ConfigManager.console_print('Correcting draft with the main model...')
+        start_time = time.time()
+        result = transcribe(audio_data, final_model, speech_mask, cancel_event=self.cancel_event)
+        ConfigManager.console_print(f'Correction completed in {time.time() - start_time:.2f} seconds. Post-processed line: {result}')
+
+        if not self.is_running or result == draft:
+            return
+
+        if not self.output_handler.replace_output(draft, result):
+            ConfigManager.console_print('Warning: Some output operations failed')
+        self.correctionSignal.emit(draft, result)
+
+    def _create_upload_encoder(self, sample_rate):
+        """
+        Return an UploadEncoder that compresses the recording for the API while it is recorded.
+
+        :param sample_rate: Sample rate in Hz of the recording
+        :return: The UploadEncoder, or None if the API is not used, uploads are not compressed or the
+                 recording will be compacted before it is uploaded
+        """
+        model_options = ConfigManager.get_snapshot('model_options')
+        upload_format = model_options.api.get('upload_format') or 'wav'
+        may_use_api = model_options.use_api or (model_options.fallback.get('policy') or 'none') != 'none'
+        if (not may_use_api or upload_format == 'wav'
+                or ConfigManager.get_config_value('recording_options', 'compact_audio')):
+            return None
+        return UploadEncoder(sample_rate, upload_format)
+
+    def _get_fallback_model(self):
+        """Return the local model to fall back to, waiting for it to load unless the thread is stopped."""
+        return self.model_manager.get_fallback_model(self.cancel_event)
+
+    def _get_local_model(self, duration):
+        """
+        Return the local model for a clip, waiting for it to finish loading if necessary.
+
+        :param duration: Duration of the clip in seconds, used to route it to a model
+        :return: The local model, or None when the clip is sent to the API
+        :raises CancelledError: If the thread was stopped while waiting for the model
+        """
+        if not self.model_manager or select_backend(duration) == 'api':
+            return None
+
+        if not self.model_manager.is_ready():
+            self.statusSignal.emit('waiting_for_model')
+            ConfigManager.console_print('Waiting for the local model to finish loading...')
+
+        local_model = self.model_manager.select_model(duration, self.cancel_event)
+        if local_model is None:
+            raise RuntimeError('The local model failed to load.')
+        return local_model
+
+    def _record_audio(self, frame_queue, chunk_transcriber=None, skip_key_press=True, upload=None):
         """
         Record audio from the microphone and save it to a temporary file.
 
-        :return: numpy array of audio data, or None if the recording is too short
+        :param frame_queue: FrameQueue subscribed to the AudioCaptureService
+        :param chunk_transcriber: Optional ChunkTranscriber that receives the recording in chunks cut at pauses
+        :param skip_key_press: Whether to ignore the first frames, which may contain the activation key press
+        :param upload: Optional UploadEncoder that receives every recorded frame
+        :return: Tuple of the numpy array of audio data, or None if the recording is too short,
+                 and a list with one VAD speech decision per frame, or None if VAD was not used
         """
         recording_options = ConfigManager.get_config_section('recording_options')
-        self.sample_rate = recording_options.get('sample_rate') or 16000
-        frame_duration_ms = 30  # 30ms frame duration for WebRTC VAD
-        frame_size = int(self.sample_rate * (frame_duration_ms / 1000.0))
+        self.sample_rate = frame_queue.sample_rate
+        frame_duration_ms = AudioCaptureService.frame_duration_ms
+        frame_size = frame_queue.frame_size
         silence_duration_ms = recording_options.get('silence_duration') or 900
         silence_frames = int(silence_duration_ms / frame_duration_ms)
 
-        # 150ms delay before starting VAD to avoid mistaking the sound of key pressing for voice
-        initial_frames_to_skip = int(0.15 * self.sample_rate / frame_size)
+        # 150ms delay before acting on VAD to avoid mistaking the sound of key pressing for voice.
+        # Pre-roll audio captured before the recording started does not start or stop it either. Only the
+        # first recording from a frame queue starts with pre-roll; later utterances in continuous mode do not.
+        preroll_frames = None
+        key_press_frames = int(0.15 * self.sample_rate / frame_size) if skip_key_press else 0
 
-        # Create VAD only for recording modes that use it
+        # Every frame gets a VAD decision so the recording can be compacted before transcription,
+        # but only recording modes that use it stop on silence. Modes that do not need VAD keep
+        # working at sample rates WebRTC VAD does not support.
         recording_mode = recording_options.get('recording_mode') or 'continuous'
+        stop_on_silence = recording_mode in ('voice_activity_detection', 'continuous', 'auto_voice_activation')
         vad = None
-        if recording_mode in ('voice_activity_detection', 'continuous', 'auto_voice_activation'):
+        if stop_on_silence or chunk_transcriber or self.sample_rate in (8000, 16000, 32000, 48000):
+            import webrtcvad
             vad = webrtcvad.Vad(2)  # VAD aggressiveness: 0 to 3, 3 being the most aggressive
-            speech_detected = False
-            silent_frame_count = 0
-
-        audio_buffer = deque(maxlen=frame_size)
-        recording = []
-
-        data_ready = Event()
-
-        def audio_callback(indata, frames, time, status):
-            if status:
-                ConfigManager.console_print(f"Audio callback status: {status}")
-            audio_buffer.extend(indata[:, 0])
-            data_ready.set()
-
-        with sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='int16',
-                            blocksize=frame_size, device=recording_options.get('sound_device'),
-                            callback=audio_callback):
-            while self.is_running and self.is_recording:
-                data_ready.wait()
-                data_ready.clear()
-
-                if len(audio_buffer) < frame_size:
-                    continue
-
-                # Save frame
-                frame = np.array(list(audio_buffer), dtype=np.int16)
-                audio_buffer.clear()
-                recording.extend(frame)
-
-                # Avoid trying to detect voice in initial frames
-                if initial_frames_to_skip > 0:
-                    initial_frames_to_skip -= 1
-                    continue
-
-                if vad:
-                    if vad.is_speech(frame.tobytes(), self.sample_rate):
-                        silent_frame_count = 0
-                        if not speech_detected:
-                            ConfigManager.console_print("Speech detected.")
-                            speech_detected = True
-                    else:
-                        silent_frame_count += 1
-
-                    if speech_detected and silent_frame_count > silence_frames:
-                        break
-
-        audio_data = np.array(recording, dtype=np.int16)
+        speech_detected = False
+        silent_frame_count = 0
+        speech_mask = []
+
+        if chunk_transcriber:
+            pause_frames = int((recording_options.get('streaming_pause_duration') or 400) / frame_duration_ms)
+            min_chunk_samples = int((recording_options.get('streaming_min_chunk_duration') or 3000)
+                                    * self.sample_rate / 1000)
+            chunk_start = 0
+            chunk_has_speech = False
+
+        recording = AudioBuffer(self.sample_rate * 60)
+
+        while self.is_running and self.is_recording:
+            # Time out regularly so that stop requests are noticed even if the device stalls
+            frame = frame_queue.get_frame(timeout=0.1)
+            if frame is None:
+                continue
+            if preroll_frames is None:
+                # The capture callback queues the pre-roll ahead of the first block, so its length is set by now
+                preroll_frames = frame_queue.preroll_samples // frame_size
+                frame_queue.preroll_samples = 0
+
+            # Save frame
+            recording.append(frame)
+            if upload is not None:
+                upload.write(frame)
+            if vad is None:
+                continue
+            frame_index = len(speech_mask)
+
+            # Avoid trying to detect voice in the key press frames after the pre-roll
+            if preroll_frames <= frame_index < preroll_frames + key_press_frames:
+                speech_mask.append(False)
+                continue
+
+            is_speech = vad.is_speech(frame.tobytes(), self.sample_rate)
+            speech_mask.append(is_speech)
+            if frame_index < preroll_frames:
+                continue
+
+            if is_speech:
+                silent_frame_count = 0
+                if not speech_detected:
+                    ConfigManager.console_print("Speech detected.")
+                    speech_detected = True
+                if chunk_transcriber:
+                    chunk_has_speech = True
+            else:
+                silent_frame_count += 1
+
+            # Hand the audio up to this pause to the chunk transcriber
+            if (chunk_transcriber and chunk_has_speech and silent_frame_count >= pause_frames
+                    and len(recording) - chunk_start >= min_chunk_samples):
+                chunk_transcriber.submit(recording.get_audio(chunk_start), speech_mask[chunk_start // frame_size:])
+                chunk_start = len(recording)
+                chunk_has_speech = False
+
+            if stop_on_silence and speech_detected and silent_frame_count > silence_frames:
+                break
+
+        # The tail is only worth decoding if it holds speech, unless nothing has been submitted yet
+        if chunk_transcriber and (chunk_has_speech or chunk_transcriber.chunk_count == 0):
+            chunk_transcriber.submit(recording.get_audio(chunk_start), speech_mask[chunk_start // frame_size:])
+
+        audio_data = recording.get_audio()
         duration = len(audio_data) / self.sample_rate
 
         ConfigManager.console_print(f'Recording finished. Size: {audio_data.size} samples, Duration: {duration:.2f} seconds')
@@ -199,9 +498,9 @@ class ResultThread(QThread):
 
         if (duration * 1000) < min_duration_ms:
             ConfigManager.console_print(f'Discarded due to being too short.')
-            return None
+            return None, None
 
-        return audio_data
+        return audio_data, speech_mask if vad else None
 
     def _handle_clipboard_status(self, success, message):
         """
@@ -0,0 +1,160 @@
+"""
+Startup benchmark for WhisperWriter.
+
+Starts a fresh interpreter with `python -X importtime` and runs the real application startup
+(WhisperWriterApp, including the key listener, model manager and typing worker), then reports how
+long it took until the main window was visible, how much resident memory the process used at that
+point (Linux only) and which imports took the longest.
+
+The benchmark fails (exit code 1) if the window takes longer than the budget to appear or if one of
+the heavy dependencies that should only be imported at first use was imported during startup, so it
+can be used as a regression check:
+
+    python src/startup_benchmark.py --budget 1.5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules that must not be imported before the main window is shown
+LAZY_MODULES = (
+    'faster_whisper',
+    'ctranslate2',
+    'openai',
+    'sounddevice',
+    'soundfile',
+    'webrtcvad',
+    'audioplayer',
+    'ui.settings_window',
+    'ui.status_window',
+)
+
+PROBE = f'''
+import os
+import sys
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+import main
+from ui.main_window import MainWindow
+from utils import ConfigManager
+
+# Without a config file the app would open the settings window instead; start with the defaults
+ConfigManager.config_file_exists = classmethod(lambda cls: True)
+
+def resident_memory_mb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+# Report as soon as the main window has been shown, before the model starts loading in the background
+show = MainWindow.show
+def show_and_report(window):
+    show(window)
+    QApplication.processEvents()
+    print('WINDOW_SHOWN', flush=True)
+    print('RESIDENT_MEMORY', resident_memory_mb(), flush=True)
+    print('EAGER_IMPORTS', ','.join(name for name in {LAZY_MODULES!r} if name in sys.modules), flush=True)
+    MainWindow.show = show
+MainWindow.show = show_and_report
+
+def quit_app():
+    app.cleanup()
+    # Skip interpreter shutdown, which would wait on the model loading in the background
+    os._exit(0)
+
+app = main.WhisperWriterApp()
+QTimer.singleShot(0, quit_app)
+app.run()
+'''
+
+
+def parse_importtime(stderr):
+    """
+    Parse the output of -X importtime.
+
+    :return: List of (cumulative microseconds, module name) tuples for top-level imports
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            # Top-level imports are indented by one space, nested imports by more
+            imports.append((int(cumulative), name.strip()))
+    return imports
+
+
+def run_once(root):
+    """
+    Start the probe in a fresh interpreter.
+
+    :return: Tuple of seconds until the window was shown, resident memory in MB at that point (None if it
+             cannot be measured), top-level imports and eagerly imported lazy modules
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.path.join(root, 'src') + os.pathsep + env.get('PYTHONPATH', '')
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    start_time = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=root, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    shown_time = None
+    resident_memory = None
+    eager_imports = []
+    for line in process.stdout:
+        if line.startswith('WINDOW_SHOWN'):
+            shown_time = time.perf_counter() - start_time
+        elif line.startswith('RESIDENT_MEMORY'):
+            value = line[len('RESIDENT_MEMORY'):].strip()
+            resident_memory = float(value) if value != 'None' else None
+        elif line.startswith('EAGER_IMPORTS'):
+            eager_imports = [name for name in line[len('EAGER_IMPORTS'):].strip().split(',') if name]
+    stderr = process.communicate()[1]
+    if process.returncode or shown_time is None:
+        sys.exit(f'Startup probe failed:\n{stderr[-4000:]}')
+    return shown_time, resident_memory, parse_importtime(stderr), eager_imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the time until the main window is shown.')
+    parser.add_argument('--budget', type=float, default=1.5, help='Maximum median seconds until the window is shown')
+    parser.add_argument('--runs', type=int, default=5, help='Number of fresh interpreters to start')
+    parser.add_argument('--top', type=int, default=15, help='Number of slowest imports to list')
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = [run_once(root) for _ in range(args.runs)]
+    shown_times = [shown_time for shown_time, _, _, _ in results]
+    resident_memory = [memory for _, memory, _, _ in results if memory is not None]
+    _, _, imports, eager_imports = results[-1]
+
+    print(f'Main window shown after {statistics.median(shown_times):.3f} s '
+          f'(median of {args.runs}, min {min(shown_times):.3f} s, max {max(shown_times):.3f} s)')
+    if resident_memory:
+        print(f'Resident memory when the window was shown: {statistics.median(resident_memory):.1f} MB')
+    print(f'Import time: {sum(cumulative for cumulative, _ in imports) / 1e6:.3f} s')
+    print('Slowest imports:')
+    for cumulative, name in sorted(imports, reverse=True)[:args.top]:
+        print(f'  {cumulative / 1000:8.1f} ms  {name}')
+
+    failures = []
+    if eager_imports:
+        failures.append(f'Modules imported before the main window was shown: {", ".join(eager_imports)}')
+    if statistics.median(shown_times) > args.budget:
+        failures.append(f'Startup exceeded the budget of {args.budget:.3f} s')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,96 @@
-import io
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, CancelledError
 import numpy as np
-import soundfile as sf
-from faster_whisper import WhisperModel
-from openai import OpenAI
 
+from api_client import ApiClient
+from audio_encoder import encode_audio
+from audio_processing import compact_audio, split_at_silences
 from utils import ConfigManager
 
-def create_local_model():
+def get_available_cpus():
+    """
+    Return the number of CPUs this process may use, taking CPU affinity and cgroup quotas into account.
+
+    :return: Tuple of the CPU count and a description of how it was determined
+    """
+    cpus = os.cpu_count() or 1
+    details = [f'{cpus} cores']
+    if hasattr(os, 'sched_getaffinity'):
+        affinity = len(os.sched_getaffinity(0))
+        if affinity < cpus:
+            cpus = affinity
+            details.append(f'affinity {affinity}')
+
+    # cgroup v2 exposes "<quota> <period>" in cpu.max, cgroup v1 uses two separate files
+    quota = period = None
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as file:
+            quota, period = file.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as file:
+                quota = file.read().strip()
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as file:
+                period = file.read().strip()
+        except OSError:
+            pass
+    try:
+        if quota not in (None, 'max', '-1'):
+            quota_cpus = max(1, int(int(quota) / int(period)))
+            if quota_cpus < cpus:
+                cpus = quota_cpus
+            details.append(f'cgroup quota {int(quota) / int(period):g}')
+    except (TypeError, ValueError, ZeroDivisionError):
+        pass
+    return cpus, ', '.join(details)
+
+def _get_thread_setting(local_model_options, key):
+    """Return a cpu_threads or num_workers setting as a positive int, or None for auto."""
+    value = local_model_options.get(key)
+    if value in (None, '', 'auto'):
+        return None
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        ConfigManager.console_print(f'Invalid {key} value {value!r}. Using auto.')
+        return None
+
+def get_worker_options():
+    """
+    Return the cpu_threads and num_workers arguments for creating local models.
+
+    Settings left at auto are derived from the CPUs available to the process. With parallel
+    transcription, the model gets one worker per concurrently decoded chunk, each with at least two
+    threads; otherwise it gets a single worker. The CPUs are divided between the workers so that
+    concurrent transcribe calls do not oversubscribe them.
+    """
+    local_model_options = ConfigManager.get_snapshot('model_options').local
+    cpus, _ = get_available_cpus()
+    num_workers = _get_thread_setting(local_model_options, 'num_workers')
+    if num_workers is None:
+        num_workers = max(1, min(4, cpus // 2)) if local_model_options.get('parallel_transcription') else 1
+    cpu_threads = _get_thread_setting(local_model_options, 'cpu_threads')
+    if cpu_threads is None:
+        cpu_threads = max(1, cpus // num_workers)
+    return {'cpu_threads': cpu_threads, 'num_workers': num_workers}
+
+def create_local_model(model_name=None):
     """
     Create a local model using the faster-whisper library.
+
+    :param model_name: Name of a model to create instead of the configured model or model path
     """
+    # Imported here so that startup and API mode do not pay for loading faster-whisper and CTranslate2
+    from faster_whisper import WhisperModel
+
     ConfigManager.console_print('Creating local model...')
     local_model_options = ConfigManager.get_config_section('model_options')['local']
     compute_type = local_model_options['compute_type']
-    model_path = local_model_options.get('model_path')
-    model_name = model_path or local_model_options['model']
+    model_path = None if model_name else local_model_options.get('model_path')
+    model_name = model_name or model_path or local_model_options['model']
 
     if compute_type == 'int8':
         device = 'cpu'
@@ -23,7 +98,10 @@ def create_local_model():
     else:
         device = local_model_options['device']
 
+    worker_options = get_worker_options()
     ConfigManager.console_print(f'Initializing {model_name} model on {device} with {compute_type}...')
+    ConfigManager.console_print(f"Using cpu_threads={worker_options['cpu_threads']}, num_workers={worker_options['num_workers']} "
+                                f"({get_available_cpus()[1]}).")
     ConfigManager.console_print('This may take several minutes on first run (downloading model)...')
 
     try:
@@ -32,93 +110,539 @@ def create_local_model():
             model = WhisperModel(model_path,
                                  device=device,
                                  compute_type=compute_type,
-                                 download_root=None)  # Prevent automatic download
+                                 download_root=None,  # Prevent automatic download
+                                 **worker_options)
         else:
             ConfigManager.console_print(f'Loading {model_name} model...')
-            model = WhisperModel(local_model_options['model'],
+            model = WhisperModel(model_name,
                                  device=device,
-                                 compute_type=compute_type)
+                                 compute_type=compute_type,
+                                 **worker_options)
     except Exception as e:
         ConfigManager.console_print(f'Error initializing WhisperModel: {e}')
         ConfigManager.console_print('Falling back to CPU.')
-        model = WhisperModel(model_path or local_model_options['model'],
+        model = WhisperModel(model_name,
                              device='cpu',
                              compute_type=compute_type,
-                             download_root=None if model_path else None)
+                             download_root=None if model_path else None,
+                             **worker_options)
 
     ConfigManager.console_print('Local model created successfully!')
     return model
 
-def transcribe_local(audio_data, local_model=None):
+def warm_up_local_model(local_model):
+    """
+    Run a short synthetic clip through a newly created local model.
+
+    The first transcription pays for lazy allocations and thread pool start-up, so doing it here lets
+    the first real dictation run at steady-state speed.
+
+    :return: Duration of the warm-up pass in seconds
+    """
+    ConfigManager.console_print('Warming up local model...')
+    sample_rate = 16000
+    # One second of quiet noise; exact silence can let the decoder stop before doing any work
+    audio = np.random.default_rng(0).normal(0.0, 0.01, sample_rate).astype(np.float32)
+    language = ConfigManager.get_config_value('model_options', 'common', 'language')
+
+    start_time = time.time()
+    segments, _ = local_model.transcribe(audio=audio, language=language)
+    for _ in segments:
+        pass
+    warm_up_time = time.time() - start_time
+
+    ConfigManager.console_print(f'Local model warmed up in {warm_up_time:.2f} seconds.')
+    return warm_up_time
+
+def get_decoding_options(duration):
+    """
+    Return the faster-whisper decoding arguments for a clip, according to the adaptive decoding policy.
+
+    Short clips, such as commands, are decoded greedily; longer dictation uses beam search. Clips that
+    fit in one 30 second window are decoded without timestamp tokens, which only matter for seeking
+    through longer audio. Word timestamps are never computed because the text is all that is used.
+
+    :param duration: Duration of the clip in seconds
+    """
+    local_model_options = ConfigManager.get_snapshot('model_options').local
+    options = {'word_timestamps': False}
+    if not local_model_options.get('adaptive_decoding'):
+        return options
+
+    if duration <= (local_model_options.get('greedy_max_duration') or 0):
+        options.update(beam_size=1, best_of=1)
+    else:
+        options.update(beam_size=max(1, local_model_options.get('beam_size') or 5))
+    if duration <= 30:
+        options['without_timestamps'] = True
+    return options
+
+def detect_language(local_model, audio_data_float):
+    """
+    Detect the language of a clip the same way faster-whisper does, from its first 30 second window.
+
+    :return: Tuple of the language code, its probability and the time detection took in seconds
+    """
+    start_time = time.perf_counter()
+    # Only the first window is needed, so the spectrogram of the rest of the clip is not computed
+    feature_extractor = local_model.feature_extractor
+    features = feature_extractor(audio_data_float[:feature_extractor.n_samples])
+    encoder_output = local_model.encode(features[:, :feature_extractor.nb_max_frames])
+    language_token, probability = local_model.model.detect_language(encoder_output)[0][0]
+    return language_token[2:-2], probability, time.perf_counter() - start_time
+
+class LanguageCache:
+    """
+    Remembers the spoken language for the session, so the local model does not detect it for every clip.
+
+    While no language is configured, the language of each clip is detected until one is detected with at
+    least language_lock_probability. Later clips are transcribed in that language without detection. It
+    is detected again after language_recheck_interval clips, or on the next clip if a transcript's average
+    log probability falls below language_recheck_logprob, which suggests that the language has changed.
+    """
+
+    def __init__(self):
+        self.language = None
+        self.skipped_detections = 0
+        self._clips_until_recheck = 0
+        self._detection_times = deque(maxlen=20)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget the locked language."""
+        with self._lock:
+            self.language = None
+            self._clips_until_recheck = 0
+
+    def get_language(self, local_model, audio_data_float):
+        """
+        Return the language to transcribe a clip in, detecting it unless a language is locked.
+
+        :param local_model: The local model that will transcribe the clip
+        :param audio_data_float: The clip as float32 audio
+        :return: The language code, or None to leave detection to faster-whisper
+        """
+        local_model_options = ConfigManager.get_snapshot('model_options').local
+        if not local_model_options.get('language_cache') or not local_model.model.is_multilingual:
+            return None
+
+        with self._lock:
+            if self.language is not None and self._clips_until_recheck > 0:
+                self._clips_until_recheck -= 1
+                self.skipped_detections += 1
+                time_saved = self.skipped_detections * float(np.mean(self._detection_times))
+                ConfigManager.console_print(f'Using cached language {self.language} ({self.skipped_detections} '
+                                            f'detections skipped, about {time_saved:.2f} seconds saved).')
+                return self.language
+
+        language, probability, detection_time = detect_language(local_model, audio_data_float)
+        ConfigManager.console_print(f'Detected language {language} ({probability:.0%}) in '
+                                    f'{detection_time * 1000:.0f} ms.')
+        with self._lock:
+            self._detection_times.append(detection_time)
+            if probability >= (local_model_options.get('language_lock_probability') or 0):
+                if language != self.language:
+                    ConfigManager.console_print(f'Locked language {language} for the session.')
+                self.language = language
+                # An interval of 0 locks the language until a transcript's confidence drops
+                self._clips_until_recheck = local_model_options.get('language_recheck_interval') or float('inf')
+            else:
+                self.language = None
+        return language
+
+    def check_confidence(self, segments):
+        """
+        Unlock the language if the transcript of a clip has a low average log probability.
+
+        :param segments: The faster-whisper segments of the transcript
+        """
+        if self.language is None or not segments:
+            return
+        threshold = ConfigManager.get_snapshot('model_options').local.get('language_recheck_logprob')
+        avg_logprob = float(np.mean([segment.avg_logprob for segment in segments]))
+        if threshold is not None and avg_logprob < threshold:
+            ConfigManager.console_print(f'Transcript confidence dropped (average log probability {avg_logprob:.2f}). '
+                                        f'Detecting the language again for the next clip.')
+            with self._lock:
+                self._clips_until_recheck = 0
+
+language_cache = LanguageCache()
+
+def check_cancelled(cancel_event):
+    """Raise CancelledError if cancel_event has been set."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise CancelledError('The transcription was cancelled.')
+
+def transcribe_local(audio_data, local_model=None, cancel_event=None):
     """
     Transcribe an audio file using a local model.
     """
+    return ''.join(transcribe_local_segments(audio_data, local_model, cancel_event))
+
+def transcribe_local_segments(audio_data, local_model=None, cancel_event=None):
+    """
+    Transcribe an audio file using a local model, yielding the raw text of each segment as soon as it is decoded.
+
+    If cancel_event is set, decoding stops after the segment in progress and CancelledError is raised.
+    """
+    check_cancelled(cancel_event)
     if not local_model:
         local_model = create_local_model()
-    model_options = ConfigManager.get_config_section('model_options')
+    model_options = ConfigManager.get_snapshot('model_options')
 
     # Convert int16 to float32
     audio_data_float = audio_data.astype(np.float32) / 32768.0
 
+    language = model_options.common.language
+    if not language:
+        language = language_cache.get_language(local_model, audio_data_float)
+
+    # The temperature is passed as a single value, so faster-whisper never falls back to sampling
+    sample_rate = ConfigManager.get_snapshot('recording_options').sample_rate or 16000
+    decoding_options = get_decoding_options(len(audio_data) / sample_rate)
+    ConfigManager.console_print(f"Decoding with beam size {decoding_options.get('beam_size', 5)}"
+                                f"{' without timestamps' if decoding_options.get('without_timestamps') else ''}.")
     response = local_model.transcribe(audio=audio_data_float,
-                                      language=model_options['common']['language'],
-                                      initial_prompt=model_options['common']['initial_prompt'],
-                                      condition_on_previous_text=model_options['local']['condition_on_previous_text'],
-                                      temperature=model_options['common']['temperature'],
-                                      vad_filter=model_options['local']['vad_filter'],)
-    return ''.join([segment.text for segment in list(response[0])])
+                                      language=language,
+                                      initial_prompt=model_options.common.initial_prompt,
+                                      condition_on_previous_text=model_options.local.condition_on_previous_text,
+                                      temperature=model_options.common.temperature,
+                                      vad_filter=model_options.local.vad_filter,
+                                      **decoding_options)
+    segments = []
+    for segment in response[0]:
+        # Abandoning the generator stops faster-whisper from decoding the remaining windows
+        check_cancelled(cancel_event)
+        segments.append(segment)
+        yield segment.text
+    if not model_options.common.language:
+        language_cache.check_confidence(segments)
+
+def transcribe_local_parallel(audio_data, speech_mask, local_model, cancel_event=None):
+    """
+    Transcribe a long recording with a local model by splitting it at pauses and transcribing the
+    chunks concurrently.
+
+    The model must have been created with num_workers > 1 for the chunks to be decoded in parallel.
+
+    :param audio_data: numpy array of int16 audio
+    :param speech_mask: Per-frame VAD decisions for audio_data
+    :param local_model: The local model to transcribe with
+    :param cancel_event: Optional threading.Event that cancels the transcription when set
+    :return: The text of all chunks, joined in order
+    """
+    local_model_options = ConfigManager.get_snapshot('model_options').local
+    recording_options = ConfigManager.get_snapshot('recording_options')
+    sample_rate = recording_options.sample_rate or 16000
+    chunks = split_at_silences(audio_data, speech_mask, sample_rate,
+                               local_model_options.get('parallel_chunk_duration') or 30.0)
+
+    def transcribe_chunk(chunk):
+        chunk_audio, chunk_mask = chunk
+        if recording_options.compact_audio:
+            chunk_audio = compact_audio(chunk_audio, chunk_mask, sample_rate)
+            if chunk_audio is None:
+                return ''
+        return transcribe_local(chunk_audio, local_model, cancel_event).strip()
+
+    num_workers = get_worker_options()['num_workers']
+    ConfigManager.console_print(f'Transcribing {len(chunks)} chunks with {num_workers} workers...')
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        texts = list(executor.map(transcribe_chunk, chunks))
+    return ' '.join(text for text in texts if text)
+
+def transcribe_api_chunked(audio_data, speech_mask, get_fallback_model=None, cancel_event=None):
+    """
+    Transcribe a long recording with the API by splitting it at pauses and uploading the chunks concurrently.
+
+    A chunk whose request fails is retried on its own without redoing the others. With the api_first or
+    local_first fallback policy, a chunk that fails again is transcribed by the model returned by
+    get_fallback_model.
+
+    :param audio_data: numpy array of int16 audio
+    :param speech_mask: Per-frame VAD decisions for audio_data
+    :param get_fallback_model: Optional callable returning the local model to fall back to
+    :param cancel_event: Optional threading.Event that abandons the uploads when set
+    :return: The text of all chunks, joined in order
+    """
+    model_options = ConfigManager.get_snapshot('model_options')
+    recording_options = ConfigManager.get_snapshot('recording_options')
+    sample_rate = recording_options.sample_rate or 16000
+    chunks = split_at_silences(audio_data, speech_mask, sample_rate,
+                               model_options.api.get('upload_chunk_duration') or 60.0)
+    falls_back = model_options.fallback.get('policy') in ('api_first', 'local_first')
+
+    def transcribe_chunk(index_and_chunk):
+        index, (chunk_audio, chunk_mask) = index_and_chunk
+        if recording_options.compact_audio:
+            chunk_audio = compact_audio(chunk_audio, chunk_mask, sample_rate)
+            if chunk_audio is None:
+                return ''
+        deadline = get_api_deadline(len(chunk_audio) / sample_rate) if falls_back else None
+        try:
+            return transcribe_api(chunk_audio, deadline=deadline, cancel_event=cancel_event).strip()
+        except CancelledError:
+            raise
+        except Exception as e:
+            ConfigManager.console_print(f'Chunk {index + 1} of {len(chunks)} failed ({e}). Retrying it.')
+        try:
+            return transcribe_api(chunk_audio, deadline=deadline, cancel_event=cancel_event).strip()
+        except CancelledError:
+            raise
+        except Exception as e:
+            if not falls_back or get_fallback_model is None:
+                raise
+            ConfigManager.console_print(f'Chunk {index + 1} of {len(chunks)} failed again ({e}). '
+                                        f'Falling back to the local model.')
+            local_model = get_fallback_model()
+            if local_model is None:
+                raise
+            return transcribe_local(chunk_audio, local_model, cancel_event).strip()
 
-def transcribe_api(audio_data):
+    concurrent_uploads = max(1, model_options.api.get('concurrent_uploads') or 1)
+    ConfigManager.console_print(f'Uploading {len(chunks)} chunks, {concurrent_uploads} at a time...')
+    with ThreadPoolExecutor(max_workers=concurrent_uploads) as executor:
+        texts = list(executor.map(transcribe_chunk, enumerate(chunks)))
+    return ' '.join(text for text in texts if text)
+
+def transcribe_api(audio_data, upload=None, deadline=None, cancel_event=None):
     """
     Transcribe an audio file using the OpenAI API.
+
+    :param upload: Optional UploadEncoder that has been encoding audio_data while it was recorded
+    :param deadline: Seconds to wait for the API before raising TimeoutError, or None to wait for the request timeout
+    :param cancel_event: Optional threading.Event that abandons the request when set
     """
     model_options = ConfigManager.get_config_section('model_options')
-    client = OpenAI(
-        api_key=os.getenv('OPENAI_API_KEY') or None,
-        base_url=model_options['api']['base_url'] or 'https://api.openai.com/v1'
-    )
 
-    # Convert numpy array to WAV file
-    byte_io = io.BytesIO()
-    sample_rate = ConfigManager.get_config_section('recording_options').get('sample_rate') or 16000
-    sf.write(byte_io, audio_data, sample_rate, format='wav')
-    byte_io.seek(0)
+    # Encode the audio in the configured upload format, unless it was encoded while recording
+    if upload is not None:
+        file = upload.finish()
+        encode_time = upload.encode_time
+    else:
+        sample_rate = ConfigManager.get_config_section('recording_options').get('sample_rate') or 16000
+        file, encode_time = encode_audio(audio_data, sample_rate, model_options['api'].get('upload_format') or 'wav')
+    wav_size = 44 + audio_data.size * 2
+    ConfigManager.console_print(f'Uploading {len(file[1]) / 1024:.1f} KB as {file[2]} ({len(file[1]) / wav_size:.0%} '
+                                f'of WAV size, encoding took {encode_time * 1000:.1f} ms).')
 
-    response = client.audio.transcriptions.create(
+    return ApiClient.get().transcribe(
+        file,
+        deadline=deadline,
+        cancel_event=cancel_event,
         model=model_options['api']['model'],
-        file=('audio.wav', byte_io, 'audio/wav'),
         language=model_options['common']['language'],
         prompt=model_options['common']['initial_prompt'],
         temperature=model_options['common']['temperature'],
     )
-    return response.text
 
 def post_process_transcription(transcription):
     """
     Apply post-processing to the transcription.
     """
     transcription = transcription.strip()
-    post_processing = ConfigManager.get_config_section('post_processing')
-    if post_processing['remove_trailing_period'] and transcription.endswith('.'):
+    post_processing = ConfigManager.get_snapshot('post_processing')
+    if post_processing.remove_trailing_period and transcription.endswith('.'):
         transcription = transcription[:-1]
-    if post_processing['add_trailing_space']:
+    if post_processing.add_trailing_space:
         transcription += ' '
-    if post_processing['remove_capitalization']:
+    if post_processing.remove_capitalization:
         transcription = transcription.lower()
 
     return transcription
 
-def transcribe(audio_data, local_model=None):
+def post_process_segments(segment_texts):
+    """
+    Apply post-processing to a transcription that arrives in segments, yielding text that can be output right away.
+
+    The joined output is the same as post_process_transcription of the joined segments. Whitespace and
+    a period at the end of a segment are held back until the next segment shows whether they end the
+    transcription, so trailing-period and trailing-space rules apply only at the very end.
+    """
+    post_processing = ConfigManager.get_snapshot('post_processing')
+    held_back = ''
+    started = False
+    for text in segment_texts:
+        text = held_back + text
+        if not started:
+            text = text.lstrip()
+        ready = text.rstrip()
+        if post_processing.remove_trailing_period and ready.endswith('.'):
+            ready = ready[:-1]
+        held_back = text[len(ready):]
+        if ready:
+            started = True
+            yield ready.lower() if post_processing.remove_capitalization else ready
+
+    ending = held_back.rstrip()
+    if post_processing.remove_trailing_period and ending.endswith('.'):
+        ending = ending[:-1]
+    if post_processing.add_trailing_space:
+        ending += ' '
+    if ending:
+        yield ending
+
+def get_api_deadline(duration):
+    """
+    Return how long to wait for the API under a fallback policy before falling back to the local model.
+
+    The deadline grows with the clip, since longer clips take longer to upload and decode.
+
+    :param duration: Duration in seconds of the audio sent to the API
+    :return: The deadline in seconds, or None to wait for the request timeout
+    """
+    fallback = ConfigManager.get_snapshot('model_options').fallback
+    base = fallback.get('api_deadline') or 0
+    if not base:
+        return None
+    return base + duration * (fallback.get('api_deadline_per_second') or 0)
+
+def select_backend(duration):
+    """
+    Return the backend that should transcribe a clip first, according to use_api and the fallback policy.
+
+    :param duration: Duration of the clip in seconds
+    :return: 'api' or 'local'
+    """
+    model_options = ConfigManager.get_snapshot('model_options')
+    policy = model_options.fallback.get('policy') or 'none'
+    if policy == 'api_first':
+        return 'api'
+    if policy == 'local_first':
+        return 'api' if duration > (model_options.fallback.get('long_clip_duration') or 0) else 'local'
+    return 'api' if model_options.use_api else 'local'
+
+def uses_local_model():
+    """Return True if the local model should be loaded for the configured backends."""
+    model_options = ConfigManager.get_snapshot('model_options')
+    policy = model_options.fallback.get('policy') or 'none'
+    if policy == 'local_first':
+        return True
+    if policy == 'api_first':
+        return bool(model_options.fallback.get('preload_local_model'))
+    return not model_options.use_api
+
+def transcribe_raw(audio_data, local_model=None, speech_mask=None, upload=None, get_fallback_model=None,
+                   cancel_event=None):
+    """
+    Transcribe audio data using the OpenAI API or a local model, depending on config, without post-processing.
+
+    If a per-frame speech mask from recording is given, non-speech is removed from the audio first.
+    An UploadEncoder given as upload holds audio_data already encoded for the API; it is only used if
+    the audio is sent unchanged.
+
+    With the api_first or local_first fallback policy, audio that the API fails to transcribe within the
+    deadline is transcribed by the model returned by get_fallback_model instead.
+
+    Setting cancel_event stops local decoding after the segment in progress and abandons pending API
+    requests; CancelledError is raised instead of returning text.
+    """
+    recording_options = ConfigManager.get_snapshot('recording_options')
+    sample_rate = recording_options.sample_rate or 16000
+    duration = len(audio_data) / sample_rate
+    backend = select_backend(duration)
+
+    # Long recordings are split at pauses before compaction, while the speech mask still lines up with the audio
+    model_options = ConfigManager.get_snapshot('model_options')
+    start_time = time.perf_counter()
+    text = None
+    if speech_mask is not None and backend == 'local' and local_model is not None:
+        if (model_options.local.get('parallel_transcription')
+                and duration > (model_options.local.get('parallel_min_duration') or 0)):
+            text = transcribe_local_parallel(audio_data, speech_mask, local_model, cancel_event)
+            path = 'local (parallel chunks)'
+    elif speech_mask is not None and backend == 'api':
+        if (model_options.api.get('chunked_upload')
+                and duration > (model_options.api.get('upload_chunk_duration') or 0)):
+            text = transcribe_api_chunked(audio_data, speech_mask, get_fallback_model, cancel_event)
+            path = 'api (concurrent chunks)'
+    if text is not None:
+        if upload is not None:
+            upload.cancel()
+        ConfigManager.console_print(f'Transcription path: {path}, time to text {time.perf_counter() - start_time:.2f} seconds.')
+        return text
+
+    if speech_mask is not None and recording_options.compact_audio:
+        if upload is not None:
+            upload.cancel()
+            upload = None
+        audio_data = compact_audio(audio_data, speech_mask, sample_rate)
+        if audio_data is None:
+            return ''
+
+    start_time = time.perf_counter()
+    fallback = ConfigManager.get_snapshot('model_options').fallback
+    if backend == 'local':
+        if upload is not None:
+            upload.cancel()
+        text = transcribe_local(audio_data, local_model, cancel_event)
+        path = 'local'
+    elif fallback.get('policy') in ('api_first', 'local_first') and get_fallback_model is not None:
+        try:
+            text = transcribe_api(audio_data, upload, deadline=get_api_deadline(len(audio_data) / sample_rate),
+                                  cancel_event=cancel_event)
+            path = 'api'
+        except CancelledError:
+            raise
+        except Exception as e:
+            ConfigManager.console_print(f'API transcription failed ({e}). Falling back to the local model.')
+            local_model = get_fallback_model()
+            if local_model is None:
+                raise
+            text = transcribe_local(audio_data, local_model, cancel_event)
+            path = 'api -> local fallback'
+    else:
+        text = transcribe_api(audio_data, upload, cancel_event=cancel_event)
+        path = 'api'
+    ConfigManager.console_print(f'Transcription path: {path}, time to text {time.perf_counter() - start_time:.2f} seconds.')
+    return text
+
+def transcribe(audio_data, local_model=None, speech_mask=None, upload=None, get_fallback_model=None,
+               cancel_event=None):
     """
     Transcribe audio date using the OpenAI API or a local model, depending on config.
     """
     if audio_data is None:
         return ''
 
-    if ConfigManager.get_config_value('model_options', 'use_api'):
-        transcription = transcribe_api(audio_data)
-    else:
-        transcription = transcribe_local(audio_data, local_model)
+    return post_process_transcription(transcribe_raw(audio_data, local_model, speech_mask, upload,
+                                                     get_fallback_model, cancel_event))
+
+def transcribe_stream(audio_data, local_model=None, speech_mask=None, upload=None, get_fallback_model=None,
+                      cancel_event=None):
+    """
+    Transcribe audio data like transcribe, but yield the post-processed text in pieces as it is decoded.
+
+    Only a single local transcription produces segments one at a time. Every other path, such as the
+    API or parallel chunks, yields the whole post-processed transcription at once.
+    """
+    if audio_data is None:
+        return
+
+    recording_options = ConfigManager.get_snapshot('recording_options')
+    local_model_options = ConfigManager.get_snapshot('model_options').local
+    sample_rate = recording_options.sample_rate or 16000
+    duration = len(audio_data) / sample_rate
+    parallel = (speech_mask is not None and local_model_options.get('parallel_transcription')
+                and duration > (local_model_options.get('parallel_min_duration') or 0))
+    if select_backend(duration) != 'local' or local_model is None or parallel:
+        yield transcribe(audio_data, local_model, speech_mask, upload, get_fallback_model, cancel_event)
+        return
 
-    return post_process_transcription(transcription)
+    if upload is not None:
+        upload.cancel()
+    if speech_mask is not None and recording_options.compact_audio:
+        audio_data = compact_audio(audio_data, speech_mask, sample_rate)
+        if audio_data is None:
+            yield post_process_transcription('')
+            return
 
+    start_time = time.perf_counter()
+    first_text = True
+    for text in post_process_segments(transcribe_local_segments(audio_data, local_model, cancel_event)):
+        if first_text:
+            ConfigManager.console_print(f'First segment ready after {time.perf_counter() - start_time:.2f} seconds.')
+            first_text = False
+        yield text
+    ConfigManager.console_print(f'Transcription path: local (streamed segments), time to text '
+                                f'{time.perf_counter() - start_time:.2f} seconds.')
@@ -0,0 +1,104 @@
+"""
+Parallel transcription benchmark for WhisperWriter.
+
+Transcribes a long clip with a single call to the local model, then in chunks cut at pauses with
+increasing numbers of workers, and reports the speedup of each. A recording can be given with
+--audio; otherwise bursts of modulated noise separated by short pauses stand in for speech:
+
+    python src/transcription_benchmark.py --model base --workers 1,2,4
+"""
+import argparse
+import os
+import time
+import numpy as np
+
+from transcription import create_local_model, transcribe_local, transcribe_local_parallel
+from utils import ConfigManager
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = int(SAMPLE_RATE * 0.03)
+
+
+def load_recording(path):
+    """
+    Read a 16 kHz mono recording and detect speech in it frame by frame.
+
+    :return: Tuple of the int16 audio and its speech mask, or None if the recording is not 16 kHz mono
+    """
+    import soundfile as sf
+    import webrtcvad
+
+    audio, file_sample_rate = sf.read(path, dtype='int16')
+    if file_sample_rate != SAMPLE_RATE or audio.ndim != 1:
+        return None
+    vad = webrtcvad.Vad(2)
+    mask = [vad.is_speech(audio[i:i + FRAME_SIZE].tobytes(), SAMPLE_RATE)
+            for i in range(0, len(audio) - FRAME_SIZE + 1, FRAME_SIZE)]
+    return audio, mask
+
+
+def synthesize_clip(minutes):
+    """
+    Return bursts of modulated noise separated by short pauses, roughly like phrases of speech.
+
+    :return: Tuple of the int16 audio and its speech mask
+    """
+    rng = np.random.default_rng(0)
+    phrase_frames, pause_frames = 90, 15
+    frame_count = int(minutes * 60 * 1000 / 30)
+    mask = [(i % (phrase_frames + pause_frames)) < phrase_frames for i in range(frame_count)]
+    envelope = np.repeat(np.array(mask, dtype=np.float32), FRAME_SIZE)
+    envelope *= 0.5 + 0.5 * np.sin(np.arange(len(envelope)) * 2 * np.pi * 4 / SAMPLE_RATE)
+    audio = (rng.standard_normal(len(envelope)) * envelope * 3000).astype(np.int16)
+    return audio, mask
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare single-call and parallel chunked local transcription.')
+    parser.add_argument('--audio', help='16 kHz mono recording to transcribe; a synthetic clip is used if omitted')
+    parser.add_argument('--minutes', type=float, default=5.0, help='Length of the synthetic clip')
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--workers', default='1,2,4,8', help='Comma-separated worker counts to try')
+    parser.add_argument('--chunk-duration', type=float, default=30.0)
+    args = parser.parse_args()
+
+    ConfigManager.initialize()
+    ConfigManager.set_config_value(False, 'misc', 'print_to_terminal')
+    ConfigManager.set_config_value(False, 'recording_options', 'compact_audio')
+    ConfigManager.set_config_value(SAMPLE_RATE, 'recording_options', 'sample_rate')
+    ConfigManager.set_config_value(args.model, 'model_options', 'local', 'model')
+    ConfigManager.set_config_value(True, 'model_options', 'local', 'parallel_transcription')
+    ConfigManager.set_config_value(args.chunk_duration, 'model_options', 'local', 'parallel_chunk_duration')
+
+    if args.audio:
+        recording = load_recording(args.audio)
+        if recording is None:
+            parser.error('The recording must be 16 kHz mono.')
+        audio, mask = recording
+    else:
+        audio, mask = synthesize_clip(args.minutes)
+
+    duration = len(audio) / SAMPLE_RATE
+    print(f'Clip: {duration:.1f} seconds, {os.cpu_count()} CPU cores, model {args.model}')
+
+    ConfigManager.set_config_value('1', 'model_options', 'local', 'num_workers')
+    model = create_local_model()
+    start_time = time.perf_counter()
+    transcribe_local(audio, model)
+    baseline = time.perf_counter() - start_time
+    print(f'single call      : {baseline:7.2f} s ({duration / baseline:5.1f}x real time)')
+    del model
+
+    for workers in (int(w) for w in args.workers.split(',')):
+        ConfigManager.set_config_value(str(workers), 'model_options', 'local', 'num_workers')
+        model = create_local_model()
+        start_time = time.perf_counter()
+        transcribe_local_parallel(audio, mask, model)
+        elapsed = time.perf_counter() - start_time
+        print(f'{workers:2d} parallel workers: {elapsed:7.2f} s ({duration / elapsed:5.1f}x real time, '
+              f'{baseline / elapsed:4.2f}x speedup)')
+        del model
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Typing strategy benchmark for WhisperWriter.
+
+Enters the same text with each typing strategy through InputSimulator, using a fake keyboard
+controller whose keystrokes fill an input queue that the target application drains at a fixed rate,
+and a fake clipboard. Reports characters per second, keystrokes sent and whether the clipboard was
+restored after pasting:
+
+    python src/typing_benchmark.py --length 2000 --target-rate 2000
+"""
+import argparse
+import time
+from contextlib import contextmanager
+
+from input_simulation import InputSimulator
+from utils import ConfigManager
+
+
+class FakeController:
+    """Keyboard controller whose keystrokes fill an input queue that the target drains at a fixed rate."""
+
+    def __init__(self, key_cost, target_rate, target_buffer):
+        self.key_cost = key_cost
+        self.target_rate = target_rate
+        self.target_buffer = target_buffer
+        self.typed = []
+        self._queued = 0.0
+        self._last_time = time.perf_counter()
+
+    def press(self, key):
+        now = time.perf_counter()
+        self._queued = max(0.0, self._queued - (now - self._last_time) * self.target_rate)
+        self._last_time = now
+        if self._queued >= self.target_buffer:
+            # The queue is full, so injecting blocks until the target has processed a keystroke
+            wait_time = (self._queued - self.target_buffer + 1) / self.target_rate
+            time.sleep(wait_time)
+            self._queued -= wait_time * self.target_rate
+            self._last_time = time.perf_counter()
+        self._queued += 1
+        time.sleep(self.key_cost)
+        if isinstance(key, str):
+            self.typed.append(key)
+
+    def release(self, key):
+        pass
+
+    @contextmanager
+    def pressed(self, key):
+        yield
+
+
+class FakeClipboard:
+    """Clipboard that starts out holding some text, to check that pasting restores it."""
+
+    previous_text = 'previous clipboard text'
+
+    def __init__(self):
+        self.text = self.previous_text
+
+    def copy(self, text):
+        self.text = text
+
+    def paste(self):
+        return self.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure characters per second for each typing strategy.')
+    parser.add_argument('--length', type=int, default=2000, help='Length of the text to enter')
+    parser.add_argument('--key-cost', type=float, default=0.00005, help='Seconds it takes to inject one keystroke')
+    parser.add_argument('--target-rate', type=float, default=2000.0,
+                        help='Keystrokes per second the target application can process')
+    parser.add_argument('--target-buffer', type=int, default=100,
+                        help='Keystrokes the input queue holds before injecting blocks')
+    args = parser.parse_args()
+
+    ConfigManager.initialize()
+    ConfigManager.set_config_value(False, 'misc', 'print_to_terminal')
+    ConfigManager.set_config_value('pynput', 'post_processing', 'input_method')
+    text = ('The quick brown fox jumps over the lazy dog. ' * (args.length // 45 + 1))[:args.length]
+
+    for strategy in ('keys', 'burst', 'paste'):
+        ConfigManager.set_config_value(strategy, 'post_processing', 'typing_strategy')
+        keyboard = FakeController(args.key_cost, args.target_rate, args.target_buffer)
+        simulator = InputSimulator(keyboard)
+        simulator.clipboard = FakeClipboard()
+        start_time = time.perf_counter()
+        simulator.typewrite(text)
+        elapsed = time.perf_counter() - start_time
+        restored = simulator.clipboard.text == FakeClipboard.previous_text
+        print(f'{strategy:>5}: {len(text) / elapsed:9.0f} chars/s ({elapsed:.3f} s, {len(keyboard.typed)} keystrokes'
+              f'{", clipboard restored" if restored and strategy == "paste" else ""})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import queue
+import threading
+import traceback
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from input_simulation import InputSimulator
+from utils import ConfigManager
+
+
+class TypingWorker(QThread):
+    """
+    Types transcriptions on a background thread, so typing long text does not block the GUI thread.
+
+    Text, corrections and completion sounds are queued and handled strictly in the order they were
+    queued, so results are typed in the order they were transcribed. New recordings can start while
+    earlier results are still being typed.
+
+    Signals:
+        progressSignal: Emits the number of characters typed so far and the length of the text being typed
+        cancelledSignal: Emits the number of queued or partly typed characters that were dropped by cancel
+    """
+
+    progressSignal = pyqtSignal(int, int)  # typed, total
+    cancelledSignal = pyqtSignal(int)
+
+    def __init__(self):
+        """
+        Initialize the TypingWorker. The input simulator is created on the worker thread.
+        """
+        super().__init__()
+        self.input_simulator = None
+        self._jobs = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._dropped_characters = 0
+        ConfigManager.subscribe(self._on_post_processing_changed, 'post_processing')
+
+    def typewrite(self, text):
+        """Queue text to be typed."""
+        if text:
+            self._jobs.put(('type', text))
+
+    def replace_text(self, old_text, new_text):
+        """Queue replacing text that was typed last, see InputSimulator.replace_text."""
+        self._jobs.put(('replace', old_text, new_text))
+
+    def play_sound(self, path):
+        """Queue playing a sound, for example once a result has been typed."""
+        self._jobs.put(('sound', path))
+
+    def reset_input_simulator(self):
+        """Queue recreating the input simulator, for example after the input method was changed."""
+        self._jobs.put(('reset',))
+
+    def cancel(self):
+        """
+        Stop typing the current text and drop all queued jobs.
+        """
+        dropped = 0
+        resets = []
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._jobs.put(job)
+                break
+            if job[0] == 'type':
+                dropped += len(job[1])
+            elif job[0] == 'reset':
+                # The input simulator must still be recreated
+                resets.append(job)
+        self._dropped_characters = dropped
+        self._cancel_event.set()
+        self._jobs.put(('cancelled',))
+        for job in resets:
+            self._jobs.put(job)
+
+    def stop(self):
+        """Stop the worker once the job in progress has finished, dropping queued jobs."""
+        ConfigManager.unsubscribe(self._on_post_processing_changed)
+        self.cancel()
+        self._jobs.put(None)
+        self.wait()
+
+    def _on_post_processing_changed(self, section_name, snapshot, previous):
+        """Recreate the input simulator after the input method was changed."""
+        if previous is not None and snapshot.get('input_method') != previous.get('input_method'):
+            self.reset_input_simulator()
+
+    def run(self):
+        """Handle queued jobs until stop is called."""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+
+            try:
+                self._handle_job(job)
+            except Exception:
+                traceback.print_exc()
+
+        if self.input_simulator is not None:
+            self.input_simulator.cleanup()
+            self.input_simulator = None
+
+    def _handle_job(self, job):
+        """Type, replace, play a sound or recreate the input simulator for a queued job."""
+        kind = job[0]
+        if kind == 'cancelled':
+            # Jobs queued after cancel was called are handled normally
+            self._cancel_event.clear()
+            if self._dropped_characters:
+                ConfigManager.console_print(f'Typing cancelled ({self._dropped_characters} characters not typed).')
+                self.cancelledSignal.emit(self._dropped_characters)
+            self._dropped_characters = 0
+            return
+        if self._cancel_event.is_set():
+            return
+
+        if kind == 'reset':
+            if self.input_simulator is not None:
+                self.input_simulator.cleanup()
+            self.input_simulator = InputSimulator()
+            return
+        if kind == 'sound':
+            from audioplayer import AudioPlayer
+            AudioPlayer(job[1]).play(block=True)
+            return
+
+        if self.input_simulator is None:
+            self.input_simulator = InputSimulator()
+        if kind == 'type':
+            text = job[1]
+            typed = self.input_simulator.typewrite(text, self._cancel_event, self.progressSignal.emit)
+            self._dropped_characters += len(text) - typed
+        elif kind == 'replace':
+            self.input_simulator.replace_text(job[1], job[2])
@@ -1,8 +1,8 @@
 import os
 import sys
 from PyQt5.QtGui import QFont
-from PyQt5.QtWidgets import QApplication, QPushButton, QHBoxLayout
-from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import QApplication, QPushButton, QHBoxLayout, QLabel
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from ui.base_window import BaseWindow
@@ -39,10 +39,29 @@ class MainWindow(BaseWindow):
         button_layout.addWidget(settings_btn)
         button_layout.addStretch(1)
 
+        self.model_status_label = QLabel('')
+        self.model_status_label.setFont(QFont('Segoe UI', 9))
+        self.model_status_label.setAlignment(Qt.AlignCenter)
+        self.model_status_label.setStyleSheet("color: #404040;")
+
         self.main_layout.addStretch(1)
         self.main_layout.addLayout(button_layout)
+        self.main_layout.addWidget(self.model_status_label)
         self.main_layout.addStretch(1)
 
+    @pyqtSlot(str)
+    def setModelStatus(self, state):
+        """
+        Show the loading state of the local model.
+        """
+        messages = {
+            'loading': 'Loading model... You can already start recording.',
+            'ready': 'Model ready.',
+            'error': 'Model failed to load. See the console for details.',
+            'unloaded': '',
+        }
+        self.model_status_label.setText(messages.get(state, ''))
+
     def closeEvent(self, event):
         """
         Close the application when the main window is closed.
@@ -185,8 +185,9 @@ class SettingsWindow(BaseWindow):
         ConfigManager.set_config_value(None, 'model_options', 'api', 'api_key')
 
         ConfigManager.save_config()
-        QMessageBox.information(self, 'Settings Saved', 'Settings have been saved. The application will now restart.')
+        QMessageBox.information(self, 'Settings Saved', 'Settings have been saved and applied.')
         self.settings_saved.emit()
+        self._saved = True
         self.close()
 
     def save_setting(self, widget, category, sub_category, key, meta):
@@ -283,6 +284,11 @@ class SettingsWindow(BaseWindow):
 
     def closeEvent(self, event):
         """Confirm before closing the settings window without saving."""
+        if getattr(self, '_saved', False):
+            self._saved = False
+            super().closeEvent(event)
+            return
+
         reply = QMessageBox.question(
             self,
             'Close without saving?',
@@ -11,11 +11,15 @@ class StatusWindow(BaseWindow):
     statusSignal = pyqtSignal(str)
     closeSignal = pyqtSignal()
 
+    # Number of characters of the partial transcript shown, so the text fits in the fixed-size window
+    max_partial_length = 90
+
     def __init__(self):
         """
         Initialize the status window.
         """
         super().__init__('WhisperWriter Status', 320, 180)
+        self.partial_text = ''
         self.initStatusUI()
         self.statusSignal.connect(self.updateStatus)
 
@@ -51,6 +55,14 @@ class StatusWindow(BaseWindow):
         status_layout.addWidget(self.status_label)
         status_layout.addStretch(1)
         
+        # Text transcribed so far while recording (streaming mode)
+        self.partial_label = QLabel('')
+        self.partial_label.setFont(QFont('Segoe UI', 10))
+        self.partial_label.setWordWrap(True)
+        self.partial_label.setAlignment(Qt.AlignCenter)
+        self.partial_label.setStyleSheet('QLabel { color: #555555; }')
+        self.partial_label.hide()  # Initially hidden
+
         # Output status layout (bottom section)
         self.output_status_layout = QVBoxLayout()
         self.output_status_layout.setContentsMargins(5, 0, 5, 0)
@@ -66,6 +78,7 @@ class StatusWindow(BaseWindow):
         
         # Add layouts to container
         container.addLayout(status_layout)
+        container.addWidget(self.partial_label)
         container.addLayout(self.output_status_layout)
 
         self.main_layout.addLayout(container)
@@ -106,10 +119,28 @@ class StatusWindow(BaseWindow):
         elif status == 'transcribing':
             self.icon_label.setPixmap(self.pencil_pixmap)
             self.status_label.setText('Transcribing...')
+        elif status == 'correcting':
+            self.icon_label.setPixmap(self.pencil_pixmap)
+            self.status_label.setText('Correcting...')
+        elif status == 'waiting_for_model':
+            self.icon_label.setPixmap(self.pencil_pixmap)
+            self.status_label.setText('Loading model...')
 
         if status in ('idle', 'error', 'cancel'):
             self.close()
         
+    @pyqtSlot(str)
+    def appendPartialResult(self, text):
+        """
+        Show the text transcribed so far while recording continues. Only the end of long text is shown.
+        """
+        self.partial_text = f'{self.partial_text} {text.strip()}'.strip()
+        shown_text = self.partial_text
+        if len(shown_text) > self.max_partial_length:
+            shown_text = '...' + shown_text[-self.max_partial_length:].lstrip()
+        self.partial_label.setText(shown_text)
+        self.partial_label.show()
+
     @pyqtSlot(str, str)
     def updateOutputStatus(self, message, status_type):
         """
@@ -162,6 +193,8 @@ if __name__ == '__main__':
     status_window.show()
 
     # Simulate status updates
+    QTimer.singleShot(1000, lambda: status_window.appendPartialResult('This is the first chunk,'))
+    QTimer.singleShot(2000, lambda: status_window.appendPartialResult('transcribed while still recording.'))
     QTimer.singleShot(3000, lambda: status_window.statusSignal.emit('transcribing'))
     QTimer.singleShot(4000, lambda: status_window.updateOutputStatus('Text copied to clipboard', 'success'))
     QTimer.singleShot(6000, lambda: status_window.updateOutputStatus('Text saved to file', 'success'))
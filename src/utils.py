@@ -1,5 +1,51 @@
+import threading
 import yaml
 import os
+from collections.abc import Mapping
+
+
+class ConfigSnapshot(Mapping):
+    """
+    Immutable view of a configuration section.
+
+    Values can be read as attributes (snapshot.sample_rate) or as a mapping (snapshot['sample_rate'],
+    snapshot.get('sample_rate')). Nested sections are snapshots themselves.
+    """
+
+    __slots__ = ('_values',)
+
+    def __init__(self, values):
+        object.__setattr__(self, '_values', {key: ConfigSnapshot(value) if isinstance(value, dict) else value
+                                             for key, value in values.items()})
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ConfigSnapshot is read-only')
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, ConfigSnapshot):
+            return self._values == other._values
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'ConfigSnapshot({self._values!r})'
+
 
 class ConfigManager:
     _instance = None
@@ -8,6 +54,11 @@ class ConfigManager:
         """Initialize the ConfigManager instance."""
         self.config = None
         self.schema = None
+        self.version = 0
+        self._snapshots = {}
+        self._published = {}
+        self._subscribers = []
+        self._lock = threading.RLock()
 
     @classmethod
     def initialize(cls, schema_path=None):
@@ -17,6 +68,7 @@ class ConfigManager:
             cls._instance.schema = cls._instance.load_config_schema(schema_path)
             cls._instance.config = cls._instance.load_default_config()
             cls._instance.load_user_config()
+            cls._instance._publish()
 
     @classmethod
     def get_schema(cls):
@@ -26,14 +78,56 @@ class ConfigManager:
         return cls._instance.schema
 
     @classmethod
-    def get_config_section(cls, *keys):
-        """Get a specific section of the configuration."""
+    def get_snapshot(cls, section_name):
+        """
+        Get the validated, read-only snapshot of a top-level configuration section.
+
+        Snapshots are built once per configuration version, so repeated calls are cheap.
+        """
+        if cls._instance is None:
+            raise RuntimeError("ConfigManager not initialized")
+
+        snapshot = cls._instance._snapshots.get(section_name)
+        if snapshot is None:
+            snapshot = cls._instance._build_snapshot(section_name)
+        return snapshot
+
+    @classmethod
+    def get_version(cls):
+        """Get a counter that increases every time the configuration changes."""
+        if cls._instance is None:
+            raise RuntimeError("ConfigManager not initialized")
+        return cls._instance.version
+
+    @classmethod
+    def subscribe(cls, callback, section_name=None):
+        """
+        Call callback(section_name, snapshot, previous_snapshot) whenever a saved or reloaded configuration
+        changes a section. previous_snapshot is None for sections that did not exist before.
+
+        If section_name is given, only changes to that section are reported.
+        """
         if cls._instance is None:
             raise RuntimeError("ConfigManager not initialized")
+        with cls._instance._lock:
+            cls._instance._subscribers.append((callback, section_name))
+
+    @classmethod
+    def unsubscribe(cls, callback):
+        """Stop calling a callback registered with subscribe."""
+        if cls._instance is None:
+            return
+        with cls._instance._lock:
+            cls._instance._subscribers = [(c, s) for c, s in cls._instance._subscribers if c != callback]
 
-        section = cls._instance.config
-        for key in keys:
-            if isinstance(section, dict) and key in section:
+    @classmethod
+    def get_config_section(cls, *keys):
+        """Get a specific section of the configuration as a read-only snapshot."""
+        if not keys:
+            return cls.get_config()
+        section = cls.get_snapshot(keys[0])
+        for key in keys[1:]:
+            if isinstance(section, Mapping) and key in section:
                 section = section[key]
             else:
                 return {}
@@ -42,12 +136,9 @@ class ConfigManager:
     @classmethod
     def get_config_value(cls, *keys):
         """Get a specific configuration value using nested keys."""
-        if cls._instance is None:
-            raise RuntimeError("ConfigManager not initialized")
-
-        value = cls._instance.config
-        for key in keys:
-            if isinstance(value, dict) and key in value:
+        value = cls.get_snapshot(keys[0])
+        for key in keys[1:]:
+            if isinstance(value, Mapping) and key in value:
                 value = value[key]
             else:
                 return None
@@ -67,6 +158,7 @@ class ConfigManager:
                 config[key] = {}
             config = config[key]
         config[keys[-1]] = value
+        cls._instance._invalidate()
 
     @classmethod
     def set_config_section(cls, section_name, section_data):
@@ -74,6 +166,7 @@ class ConfigManager:
         if cls._instance is None:
             raise RuntimeError("ConfigManager not initialized")
         cls._instance.config[section_name] = section_data
+        cls._instance._invalidate()
 
     @classmethod  
     def get_config(cls):
@@ -82,6 +175,22 @@ class ConfigManager:
             raise RuntimeError("ConfigManager not initialized")
         return cls._instance.config
 
+    @staticmethod
+    def get_changed_keys(old_config, new_config, prefix=()):
+        """
+        Return the set of key paths, as tuples, whose values differ between two configurations.
+
+        Configurations can be dictionaries or snapshots.
+        """
+        changed = set()
+        for key in set(old_config) | set(new_config):
+            old_value, new_value = old_config.get(key), new_config.get(key)
+            if isinstance(old_value, Mapping) and isinstance(new_value, Mapping):
+                changed |= ConfigManager.get_changed_keys(old_value, new_value, prefix + (key,))
+            elif old_value != new_value:
+                changed.add(prefix + (key,))
+        return changed
+
     @staticmethod
     def load_config_schema(schema_path=None):
         """Load the configuration schema from a YAML file."""
@@ -132,6 +241,7 @@ class ConfigManager:
             raise RuntimeError("ConfigManager not initialized")
         with open(config_path, 'w') as file:
             yaml.dump(cls._instance.config, file, default_flow_style=False)
+        cls._instance._publish()
 
     @classmethod
     def reload_config(cls):
@@ -142,6 +252,8 @@ class ConfigManager:
             raise RuntimeError("ConfigManager not initialized")
         cls._instance.config = cls._instance.load_default_config()
         cls._instance.load_user_config()
+        cls._instance._invalidate()
+        cls._instance._publish()
 
     @classmethod
     def config_file_exists(cls):
@@ -152,5 +264,78 @@ class ConfigManager:
     @classmethod
     def console_print(cls, message):
         """Print a message to the console if enabled in the configuration."""
-        if cls._instance and cls._instance.config['misc']['print_to_terminal']:
+        if cls._instance and cls.get_snapshot('misc').get('print_to_terminal'):
             print(message)
+
+    def _invalidate(self):
+        """Drop the cached snapshots after the configuration has changed."""
+        with self._lock:
+            self._snapshots = {}
+            self.version += 1
+
+    def _build_snapshot(self, section_name):
+        with self._lock:
+            snapshot = self._snapshots.get(section_name)
+            if snapshot is None:
+                values = self.config.get(section_name)
+                if not isinstance(values, dict):
+                    values = {}
+                snapshot = ConfigSnapshot(self._validate(self.schema.get(section_name) or {}, values, (section_name,)))
+                self._snapshots[section_name] = snapshot
+            return snapshot
+
+    def _validate(self, schema, values, path):
+        """Return a copy of values converted to the types declared in the schema, replacing invalid values with defaults."""
+        validated = {}
+        for key, value in values.items():
+            meta = schema.get(key)
+            if isinstance(value, dict):
+                validated[key] = self._validate(meta if isinstance(meta, dict) else {}, value, path + (key,))
+            elif isinstance(meta, dict) and 'type' in meta:
+                validated[key] = self._validate_value(meta, value, path + (key,))
+            else:
+                validated[key] = value
+        return validated
+
+    @staticmethod
+    def _validate_value(meta, value, path):
+        if value is None:
+            return None
+        try:
+            if meta['type'] == 'bool':
+                if isinstance(value, str):
+                    if value.lower() not in ('true', 'false'):
+                        raise ValueError(value)
+                    value = value.lower() == 'true'
+                elif not isinstance(value, bool):
+                    raise ValueError(value)
+            elif meta['type'] == 'int' and not isinstance(value, bool):
+                value = int(value)
+            elif meta['type'] == 'float':
+                value = float(value)
+            if meta.get('options') and value not in meta['options']:
+                if meta['type'] != 'str':
+                    raise ValueError(value)
+                # Options of text settings, such as model names, are suggestions rather than a complete list
+                print(f"Warning: {value!r} is not one of the listed options for {'.'.join(path)}. Using it anyway.")
+        except (TypeError, ValueError):
+            print(f"Invalid value {value!r} for {'.'.join(path)}. Using the default value {meta.get('value')!r}.")
+            return meta.get('value')
+        return value
+
+    def _publish(self):
+        """Notify subscribers of every section that changed since the last publish."""
+        with self._lock:
+            changed = []
+            for section_name in set(self.config) | set(self._published):
+                snapshot = self._build_snapshot(section_name)
+                previous = self._published.get(section_name)
+                if previous != snapshot:
+                    self._published[section_name] = snapshot
+                    changed.append((section_name, snapshot, previous))
+            subscribers = list(self._subscribers)
+
+        for section_name, snapshot, previous in changed:
+            for callback, subscribed_section in subscribers:
+                if subscribed_section in (None, section_name):
+                    callback(section_name, snapshot, previous)
@@ -1,11 +1,6 @@
-import time
-import numpy as np
-import sounddevice as sd
-import webrtcvad
 from PyQt5.QtCore import QThread, QMutex, pyqtSignal
-from collections import deque
-from threading import Event
 
+from audio_capture import AudioCaptureService
 from utils import ConfigManager
 
 
@@ -40,44 +35,25 @@ class VoiceListenerThread(QThread):
         try:
             ConfigManager.console_print('Voice listener started - waiting for speech...')
             
-            recording_options = ConfigManager.get_config_section('recording_options')
-            self.sample_rate = recording_options.get('sample_rate') or 16000
-            frame_duration_ms = 30  # 30ms frame duration for WebRTC VAD
-            frame_size = int(self.sample_rate * (frame_duration_ms / 1000.0))
-
             # Create VAD for voice detection
+            import webrtcvad
             vad = webrtcvad.Vad(2)  # VAD aggressiveness: 0 to 3, 3 being the most aggressive
             
             # Need consecutive voice frames to avoid false positives
             consecutive_voice_frames_needed = 3
             consecutive_voice_count = 0
 
-            audio_buffer = deque(maxlen=frame_size)
-            data_ready = Event()
-
-            def audio_callback(indata, frames, time, status):
-                if status:
-                    ConfigManager.console_print(f"Voice listener audio callback status: {status}")
-                audio_buffer.extend(indata[:, 0])
-                data_ready.set()
+            # The shared capture stream stays open, so the recording started by voiceDetectedSignal
+            # receives the speech that triggered it through its pre-roll
+            frame_queue = AudioCaptureService.subscribe()
+            self.sample_rate = frame_queue.sample_rate
 
-            with sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='int16',
-                                blocksize=frame_size, device=recording_options.get('sound_device'),
-                                callback=audio_callback):
+            try:
                 while self.is_running:
-                    data_ready.wait(timeout=0.1)  # Add timeout to check is_running regularly
-                    if not self.is_running:
-                        break
-                        
-                    data_ready.clear()
-
-                    if len(audio_buffer) < frame_size:
+                    frame = frame_queue.get_frame(timeout=0.1)  # Time out to check is_running regularly
+                    if frame is None or not self.is_running:
                         continue
 
-                    # Process frame for voice detection
-                    frame = np.array(list(audio_buffer), dtype=np.int16)
-                    audio_buffer.clear()
-
                     # Check if frame contains speech
                     if vad.is_speech(frame.tobytes(), self.sample_rate):
                         consecutive_voice_count += 1
@@ -87,6 +63,8 @@ class VoiceListenerThread(QThread):
                             break
                     else:
                         consecutive_voice_count = 0
+            finally:
+                AudioCaptureService.unsubscribe(frame_queue)
 
         except Exception as e:
             ConfigManager.console_print(f'Voice listener error: {e}')